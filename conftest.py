@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def nplusone_raise(settings):
+    """Найденный N+1 роняет тест, как в core.runner.TestRunner."""
+    settings.NPLUSONE_MODE = 'raise'
@@ -0,0 +1,175 @@
+import functools
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.base import Template
+from sorl.thumbnail import default
+
+from . import slow_sql
+from .metrics import registry
+
+_state = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны и миниатюры.
+
+    Время шаблонов включает запросы и миниатюры, выполненные
+    во время отрисовки, поэтому слагаемые могут пересекаться.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.thumbnail_time = 0.0
+        self.total_time = None
+        self.shapes = None
+        self._render_depth = 0
+
+    def track_shapes(self):
+        """Считать повторы форм запросов (для поиска N+1)."""
+        if self.shapes is None:
+            self.shapes = {}
+
+    def _count_shape(self, sql):
+        shape = slow_sql.normalize(sql)
+        seen = self.shapes.get(shape)
+        if seen is None:
+            # Кадры приложения первого вызова: откуда начался повтор.
+            stack, template = slow_sql.attribute(sys._getframe(2))
+            seen = self.shapes[shape] = {
+                'count': 0, 'stack': stack[:3], 'template': template,
+            }
+        seen['count'] += 1
+
+    def finish(self):
+        self.total_time = self.elapsed()
+
+    def elapsed(self):
+        """Время с начала сбора; для завершённого сбора — итоговое."""
+        if self.total_time is not None:
+            return self.total_time
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'render_ms': round(self.render_time * 1000, 3),
+            'thumbnail_ms': round(self.thumbnail_time * 1000, 3),
+            'total_ms': round(self.elapsed() * 1000, 3),
+        }
+
+
+def current_metrics():
+    """Метрики запроса, обрабатываемого в этом потоке, или None."""
+    return getattr(_state, 'metrics', None)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = current_metrics()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += duration
+        if metrics.shapes is not None:
+            metrics._count_shape(sql)
+    slow_sql.log_query(sql, params, duration)
+    return result
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        metrics = current_metrics()
+        if metrics is None:
+            return render(self, *args, **kwargs)
+        # Вложенные шаблоны ({% include %}, теги включения) уже
+        # учтены во времени внешнего.
+        metrics._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics._render_depth -= 1
+            if not metrics._render_depth:
+                metrics.render_time += time.perf_counter() - started
+    return wrapper
+
+
+def _timed_thumbnail(get_thumbnail):
+    @functools.wraps(get_thumbnail)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics()
+        if metrics is None:
+            return get_thumbnail(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return get_thumbnail(*args, **kwargs)
+        finally:
+            metrics.thumbnail_time += time.perf_counter() - started
+    return wrapper
+
+
+def _counted_creation(create_thumbnail):
+    @functools.wraps(create_thumbnail)
+    def wrapper(*args, **kwargs):
+        registry.inc('yatube_thumbnails_generated_total')
+        return create_thumbnail(*args, **kwargs)
+    return wrapper
+
+
+def install():
+    """Подключить замеры отрисовки шаблонов и sorl-thumbnail.
+
+    Вызывается один раз. Время считается только внутри collect(),
+    созданные миниатюры — всегда.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        Template.render = _timed_render(Template.render)
+        default.backend.get_thumbnail = _timed_thumbnail(
+            default.backend.get_thumbnail
+        )
+        default.backend._create_thumbnail = _counted_creation(
+            default.backend._create_thumbnail
+        )
+        _installed = True
+
+
+@contextmanager
+def collect():
+    """Собирать метрики кода внутри блока и вернуть их.
+
+    Вложенный блок пополняет метрики внешнего.
+    """
+    previous = current_metrics()
+    if previous is not None:
+        yield previous
+        return
+    metrics = RequestMetrics()
+    _state.metrics = metrics
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(_record_query)
+                )
+            yield metrics
+    finally:
+        metrics.finish()
+        _state.metrics = None
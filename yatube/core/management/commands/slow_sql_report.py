@@ -0,0 +1,55 @@
+import glob
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import slow_sql
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных SQL-запросов: формы запросов, '
+        'упорядоченные по суммарному времени.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.SLOW_SQL_LOG,
+            help='Журнал; ротированные файлы log.1, log.2... тоже читаются.',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON.',
+        )
+
+    def read_lines(self, path):
+        paths = sorted(glob.glob(f'{glob.escape(path)}.*')) + [path]
+        found = False
+        for name in paths:
+            try:
+                with open(name, encoding='utf-8') as file:
+                    found = True
+                    yield from file
+            except FileNotFoundError:
+                continue
+        if not found:
+            raise CommandError(f'Журнал {path} не найден.')
+
+    def handle(self, *args, **options):
+        shapes = slow_sql.report(
+            self.read_lines(options['log']), top=options['top']
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(shapes, ensure_ascii=False,
+                                         indent=2))
+            return
+        for place, shape in enumerate(shapes, start=1):
+            self.stdout.write(self.style.SUCCESS(
+                f'{place}. {shape["total_ms"]} мс всего, '
+                f'{shape["count"]} раз, в среднем {shape["mean_ms"]} мс, '
+                f'максимум {shape["max_ms"]} мс'
+            ))
+            self.stdout.write(f'   {shape["sql"]}')
+            for source, count in shape['sources']:
+                self.stdout.write(f'   {count} × {source}')
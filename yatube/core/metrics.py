@@ -0,0 +1,323 @@
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: снимки складываются без блокировки.
+    fcntl = None
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+ARCHIVE_NAME = 'archive.json'
+LOCK_NAME = 'metrics.lock'
+
+METRICS = {
+    'yatube_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса по имени маршрута.'
+    ),
+    'yatube_responses_total': (
+        COUNTER, 'Ответы по имени маршрута и коду статуса.'
+    ),
+    'yatube_db_queries_total': (
+        COUNTER, 'SQL-запросы по имени маршрута.'
+    ),
+    'yatube_cache_requests_total': (
+        COUNTER, 'Обращения к кешу лент: попадания и промахи.'
+    ),
+    'yatube_thumbnails_generated_total': (
+        COUNTER, 'Созданные файлы миниатюр.'
+    ),
+    'yatube_requests_in_flight': (
+        GAUGE, 'Запросы, которые обрабатываются сейчас.'
+    ),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _total(snapshots):
+    """Сумма значений и гистограмм снимков."""
+    values = {COUNTER: defaultdict(float), GAUGE: defaultdict(float)}
+    histograms = {}
+    for snapshot in snapshots:
+        for kind in (COUNTER, GAUGE):
+            for name, labels, value in snapshot[kind]:
+                values[kind][_key(name, dict(labels))] += value
+        for name, labels, histogram in snapshot[HISTOGRAM]:
+            key = _key(name, dict(labels))
+            total = histograms.setdefault(key, {
+                'buckets': histogram['buckets'],
+                'counts': [0] * len(histogram['counts']),
+                'sum': 0.0,
+            })
+            for position, count in enumerate(histogram['counts']):
+                total['counts'][position] += count
+            total['sum'] += histogram['sum']
+    return values, histograms
+
+
+class Registry:
+    """Метрики процесса с общим снимком для всех рабочих процессов.
+
+    Значения меняются под блокировкой, поэтому потоки не теряют
+    приращений. Если задан каталог, процесс периодически сохраняет
+    в нём свой снимок, а collect() складывает снимки всех процессов.
+    Счётчики завершившихся процессов переносятся в общий архив, а их
+    файлы удаляются; показания gauge при этом отбрасываются. Имя
+    файла содержит случайный токен процесса, поэтому процесс,
+    получивший номер завершившегося, не перезаписывает его снимок.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.token = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._flushed_pid = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.values = {COUNTER: defaultdict(float),
+                           GAUGE: defaultdict(float)}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self.values[COUNTER][_key(name, labels)] += value
+
+    def add(self, name, value, **labels):
+        with self._lock:
+            self.values[GAUGE][_key(name, labels)] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * (len(buckets) + 1),
+                    'sum': 0.0,
+                }
+            position = bisect.bisect_left(histogram['buckets'], value)
+            histogram['counts'][position] += 1
+            histogram['sum'] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'token': self.token,
+                COUNTER: [[name, labels, value] for (name, labels), value
+                          in self.values[COUNTER].items()],
+                GAUGE: [[name, labels, value] for (name, labels), value
+                        in self.values[GAUGE].items()],
+                HISTOGRAM: [
+                    [name, labels, dict(histogram,
+                                        counts=list(histogram['counts']))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def _path(self):
+        return os.path.join(self.directory,
+                            f'process-{os.getpid()}-{self.token}.json')
+
+    def _write(self, path, snapshot):
+        handle, temporary = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def _exclusive(self):
+        """Блокировка каталога на время переноса снимков в архив."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_NAME), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _archive(self, paths):
+        """Добавить счётчики снимков в архив и удалить их файлы.
+
+        Вызывается под _exclusive(), поэтому снимок не попадёт в архив
+        дважды и не пропадёт из суммы между записью архива и удалением.
+        """
+        snapshots = [s for s in map(self._read, paths) if s is not None]
+        if not snapshots:
+            return
+        archive_path = os.path.join(self.directory, ARCHIVE_NAME)
+        archive = self._read(archive_path)
+        for snapshot in snapshots:
+            snapshot[GAUGE] = []
+        values, histograms = _total(
+            [archive, *snapshots] if archive else snapshots
+        )
+        self._write(archive_path, {
+            'pid': None,
+            COUNTER: [[name, labels, value] for (name, labels), value
+                      in values[COUNTER].items()],
+            GAUGE: [],
+            HISTOGRAM: [[name, labels, histogram] for (name, labels),
+                        histogram in histograms.items()],
+        })
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _stale(self, path, snapshot):
+        """Снимок процесса, который уже завершился."""
+        if snapshot['pid'] == os.getpid():
+            # Номер достался этому процессу от завершившегося.
+            return path != self._path()
+        return not _pid_alive(snapshot['pid'])
+
+    def _processes(self):
+        return glob.glob(os.path.join(self.directory, 'process-*.json'))
+
+    def flush(self, force=False):
+        """Сохранить снимок процесса не чаще раза в flush_interval."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        pid = os.getpid()
+        if self._flushed_pid != pid:
+            prefix = os.path.join(self.directory, f'process-{pid}-')
+            with self._exclusive():
+                self._archive([
+                    path for path in self._processes()
+                    if path.startswith(prefix) and path != self._path()
+                ])
+            self._flushed_pid = pid
+        self._write(self._path(), self.snapshot())
+
+    def _snapshots(self):
+        snapshots = [self.snapshot()]
+        if not self.directory:
+            return snapshots
+        with self._exclusive():
+            stale = []
+            for path in self._processes():
+                if path == self._path():
+                    continue
+                snapshot = self._read(path)
+                if snapshot is None:
+                    continue
+                if self._stale(path, snapshot):
+                    stale.append(path)
+                else:
+                    snapshots.append(snapshot)
+            self._archive(stale)
+            archive = self._read(os.path.join(self.directory, ARCHIVE_NAME))
+        if archive is not None:
+            snapshots.append(archive)
+        return snapshots
+
+    def collect(self):
+        """Сумма метрик всех процессов."""
+        return _total(self._snapshots())
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def render(registry):
+    """Метрики в текстовом формате Prometheus."""
+    values, histograms = registry.collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == HISTOGRAM:
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                bounds = [*map(_number, histogram['buckets']), '+Inf']
+                for bound, count in zip(bounds, histogram['counts']):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{_labels(labels, le=bound)} '
+                        f'{cumulative}'
+                    )
+                lines.append(
+                    f'{name}_sum{_labels(labels)} {histogram["sum"]!r}'
+                )
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+            continue
+        for (metric, labels), value in sorted(values[kind].items()):
+            if metric == name:
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry(
+    directory=getattr(settings, 'METRICS_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+)
+
+
+def record_cache(name, hit):
+    """Учесть обращение к кешу name (index_page, post_card)."""
+    registry.inc('yatube_cache_requests_total', cache=name,
+                 result='hit' if hit else 'miss')
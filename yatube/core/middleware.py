@@ -0,0 +1,173 @@
+import cProfile
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation, nplusone, profiling
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def view_name(request):
+    """Имя маршрута вида posts:index или None, если адрес не найден."""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else None
+
+
+def server_timing(metrics):
+    return ', '.join((
+        f'db;dur={metrics.db_time * 1000:.3f};desc="{metrics.queries} SQL"',
+        f'tpl;dur={metrics.render_time * 1000:.3f}',
+        f'thumb;dur={metrics.thumbnail_time * 1000:.3f}',
+        f'total;dur={metrics.elapsed() * 1000:.3f}',
+    ))
+
+
+class RequestTimingMiddleware:
+    """Замеры SQL, шаблонов и миниатюр для каждого запроса.
+
+    Включается настройкой REQUEST_TIMING. Результат отдаётся
+    в заголовке Server-Timing и пишется в журнал core.middleware
+    строкой JSON.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        with instrumentation.collect() as metrics:
+            response = self.get_response(request)
+        response['Server-Timing'] = server_timing(metrics)
+        logger.info(json.dumps({
+            'view': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware:
+    """Метрики для /metrics: задержки, SQL и запросы в обработке.
+
+    Включается настройкой METRICS.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        registry.add('yatube_requests_in_flight', 1)
+        try:
+            with instrumentation.collect() as metrics:
+                started = metrics.elapsed()
+                response = self.get_response(request)
+                duration = metrics.elapsed() - started
+        finally:
+            registry.add('yatube_requests_in_flight', -1)
+        view = view_name(request) or 'unknown'
+        registry.observe('yatube_request_duration_seconds', duration,
+                         view=view)
+        registry.inc('yatube_responses_total', view=view,
+                     status=response.status_code)
+        registry.inc('yatube_db_queries_total', metrics.queries, view=view)
+        registry.flush()
+        return response
+
+
+class ProfilerMiddleware:
+    """cProfile представления и отрисовки по запросу или выборочно.
+
+    Сотрудник включает профилирование параметром ?profile=1 или
+    заголовком X-Profile: 1 и получает имя файла в заголовке X-Profile.
+    Кроме того, доля PROFILER_SAMPLE_RATE запросов профилируется,
+    а профиль сохраняется, если запрос дольше PROFILER_SLOW_MS.
+    Профили пишутся в PROFILER_DIR, хранятся последние
+    PROFILER_MAX_FILES. Стоит после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def requested(self, request):
+        flag = (request.GET.get('profile')
+                or request.META.get('HTTP_X_PROFILE'))
+        user = getattr(request, 'user', None)
+        return (flag == '1' and user is not None
+                and user.is_authenticated and user.is_staff)
+
+    def __call__(self, request):
+        requested = self.requested(request)
+        if not requested and random.random() >= settings.PROFILER_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        duration = time.perf_counter() - started
+        if requested or duration * 1000 >= settings.PROFILER_SLOW_MS:
+            name = profiling.save_profile(
+                profile,
+                settings.PROFILER_DIR,
+                view_name(request) or 'unknown',
+                duration,
+                settings.PROFILER_MAX_FILES,
+            )
+            if requested:
+                response['X-Profile'] = name
+        return response
+
+
+class SlowQueryMiddleware:
+    """Журнал SQL-запросов представлений дольше SLOW_SQL_MS.
+
+    Запрос пишется в журнал core.slow_sql с параметрами и кадром
+    приложения, из которого он выполнен. Без настройки отключено.
+    """
+
+    def __init__(self, get_response):
+        if getattr(settings, 'SLOW_SQL_MS', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.collect():
+            return self.get_response(request)
+
+
+class NPlusOneMiddleware:
+    """Поиск N+1: запрос одной формы повторяется в ответе много раз.
+
+    Порог — NPLUSONE_THRESHOLD. NPLUSONE_MODE = 'raise' поднимает
+    RepeatedQueriesError (так работают тесты), 'warn' выдаёт
+    предупреждение; без настройки детектор включён только в DEBUG.
+    """
+
+    def __init__(self, get_response):
+        if nplusone.mode() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.collect() as metrics:
+            metrics.track_shapes()
+            response = self.get_response(request)
+        nplusone.check(view_name(request) or request.path, metrics)
+        return response
@@ -0,0 +1,56 @@
+import warnings
+
+from django.conf import settings
+
+
+class RepeatedQueriesError(AssertionError):
+    """Запрос одной формы выполнен слишком много раз (N+1)."""
+
+
+class RepeatedQueriesWarning(UserWarning):
+    pass
+
+
+def repeated(metrics, threshold, ignore=()):
+    """Формы запросов, повторённые не меньше threshold раз.
+
+    Формы, содержащие строку из ignore, пропускаются.
+    """
+    return [
+        (shape, seen) for shape, seen in (metrics.shapes or {}).items()
+        if seen['count'] >= threshold
+        and not any(part in shape for part in ignore)
+    ]
+
+
+def describe(view, found):
+    lines = [f'{view}: повторяющиеся запросы (N+1):']
+    for shape, seen in found:
+        origin = ' <- '.join(seen['stack']) or 'unknown'
+        if seen['template']:
+            origin += f' ({seen["template"]})'
+        lines.append(f'  {seen["count"]} × {shape}')
+        lines.append(f'    из {origin}')
+    return '\n'.join(lines)
+
+
+def mode():
+    """'raise', 'warn' или None; по умолчанию предупреждения в DEBUG."""
+    value = getattr(settings, 'NPLUSONE_MODE', None)
+    if value is None and settings.DEBUG:
+        return 'warn'
+    return value
+
+
+def check(view, metrics):
+    """Сообщить о N+1 в ответе view; NPLUSONE_IGNORE — по имени view."""
+    found = repeated(
+        metrics, settings.NPLUSONE_THRESHOLD,
+        settings.NPLUSONE_IGNORE.get(view, ()),
+    )
+    if not found:
+        return
+    message = describe(view, found)
+    if mode() == 'raise':
+        raise RepeatedQueriesError(message)
+    warnings.warn(message, RepeatedQueriesWarning, stacklevel=2)
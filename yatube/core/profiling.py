@@ -0,0 +1,100 @@
+import glob
+import os
+import pstats
+import time
+
+PSTATS_SUFFIX = '.pstats'
+COLLAPSED_SUFFIX = '.collapsed'
+MIN_SAMPLE_US = 1
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{os.path.basename(filename)}:{line}:{name}'
+
+
+def _call_graph(stats):
+    """Рёбра к вызываемым функциям и время входов в граф извне."""
+    callees = {}
+    roots = {}
+    for func, (primitive, calls, _, total, callers) in stats.stats.items():
+        entered = 0
+        for caller, edge in callers.items():
+            if caller not in stats.stats:
+                continue
+            entered += edge[0]
+            if caller != func:
+                callees.setdefault(caller, {})[func] = edge[3]
+        # Вызовы из кадров, начатых до включения профилировщика, не
+        # записаны среди рёбер. Для рекурсивной функции внешний вызов
+        # охватывает всё её время.
+        if entered < calls:
+            share = 1 if primitive < calls else (calls - entered) / calls
+            roots[func] = total * share
+    return callees, roots
+
+
+def collapsed_stacks(stats):
+    """Строки «стек;вызов микросекунды» для flamegraph.pl и speedscope.
+
+    cProfile хранит только пары вызывающий-вызываемый, поэтому время
+    функции делится между путями к ней пропорционально времени рёбер.
+    """
+    callees, roots = _call_graph(stats)
+    lines = {}
+
+    def walk(func, stack, cumulative):
+        if cumulative * 1_000_000 < MIN_SAMPLE_US:
+            return
+        own_total, total = stats.stats[func][2], stats.stats[func][3]
+        share = cumulative / total if total else 0
+        stack = stack + (_label(func),)
+        own = round(own_total * share * 1_000_000)
+        if own >= MIN_SAMPLE_US:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + own
+        for callee, edge in callees.get(func, {}).items():
+            if _label(callee) in stack:
+                continue
+            walk(callee, stack, edge * share)
+
+    for root, cumulative in roots.items():
+        walk(root, (), cumulative)
+    return [f'{stack} {value}' for stack, value in lines.items()]
+
+
+def rotate(directory, keep):
+    """Оставить в каталоге только keep последних профилей."""
+    profiles = sorted(
+        glob.glob(os.path.join(directory, f'*{PSTATS_SUFFIX}')),
+        key=os.path.getmtime,
+    )
+    for path in profiles[:max(len(profiles) - keep, 0)]:
+        for name in (path, path[:-len(PSTATS_SUFFIX)] + COLLAPSED_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profile, directory, label, duration, keep):
+    """Записать .pstats и .collapsed профиля и вернуть общее имя файлов."""
+    os.makedirs(directory, exist_ok=True)
+    name = '{}-{}-{}ms'.format(
+        time.strftime('%Y%m%d-%H%M%S'),
+        label.replace(':', '.').replace(os.sep, '_'),
+        round(duration * 1000),
+    )
+    base = os.path.join(directory, name)
+    suffix = 0
+    while os.path.exists(base + PSTATS_SUFFIX):
+        suffix += 1
+        base = os.path.join(directory, f'{name}-{suffix}')
+    profile.dump_stats(base + PSTATS_SUFFIX)
+    stats = pstats.Stats(base + PSTATS_SUFFIX)
+    with open(base + COLLAPSED_SUFFIX, 'w') as file:
+        file.write('\n'.join(collapsed_stacks(stats)) + '\n')
+    rotate(directory, keep)
+    return os.path.basename(base)
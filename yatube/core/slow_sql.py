@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import re
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PARAMS_LIMIT = 500
+SKIPPED_MODULES = (
+    os.path.join('core', 'instrumentation.py'),
+    os.path.join('core', 'slow_sql.py'),
+)
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def _is_app_file(filename):
+    return (
+        filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in filename
+        and not filename.endswith(SKIPPED_MODULES)
+    )
+
+
+def _describe(frame):
+    code = frame.f_code
+    return '{}:{} in {}'.format(
+        os.path.relpath(code.co_filename, settings.BASE_DIR),
+        frame.f_lineno,
+        code.co_name,
+    )
+
+
+def attribute(frame):
+    """Кадры приложения, вызвавшие запрос, и шаблон, если он рисовался.
+
+    Возвращает кадры «файл:строка in функция» относительно BASE_DIR,
+    начиная с ближайшего к запросу, и имя самого глубокого
+    отрисовываемого шаблона.
+    """
+    stack, template = [], None
+    while frame is not None:
+        code = frame.f_code
+        if _is_app_file(code.co_filename):
+            stack.append(_describe(frame))
+        if (template is None and code.co_name == '_render'
+                and code.co_filename.endswith(
+                    os.path.join('django', 'template', 'base.py'))):
+            origin = getattr(frame.f_locals.get('self'), 'origin', None)
+            template = getattr(origin, 'template_name', None)
+        frame = frame.f_back
+    return stack, template
+
+
+def log_query(sql, params, duration):
+    """Записать запрос, если он дольше SLOW_SQL_MS."""
+    threshold = getattr(settings, 'SLOW_SQL_MS', None)
+    if threshold is None or duration * 1000 < threshold:
+        return
+    stack, template = attribute(sys._getframe(1))
+    logger.warning(json.dumps({
+        'duration_ms': round(duration * 1000, 3),
+        'sql': sql,
+        'params': repr(params)[:PARAMS_LIMIT],
+        'source': stack[0] if stack else None,
+        'stack': stack,
+        'template': template,
+    }, ensure_ascii=False))
+
+
+def normalize(sql):
+    """Форма запроса: литералы и списки IN заменены заполнителями."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def report(lines, top=20):
+    """Группы медленных запросов по форме, от самых затратных.
+
+    lines — строки журнала; строки не в формате JSON пропускаются,
+    поэтому журнал может содержать префиксы форматтера.
+    """
+    shapes = defaultdict(lambda: {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+        'sources': defaultdict(int),
+    })
+    for line in lines:
+        start = line.find('{')
+        if start == -1:
+            continue
+        try:
+            entry = json.loads(line[start:])
+        except ValueError:
+            continue
+        shape = shapes[normalize(entry['sql'])]
+        shape['count'] += 1
+        shape['total_ms'] += entry['duration_ms']
+        shape['max_ms'] = max(shape['max_ms'], entry['duration_ms'])
+        # Ближайший кадр и его вызывающий: get_page пагинатора сам
+        # по себе не говорит, из какого представления он вызван.
+        origin = (' <- '.join(entry.get('stack', [])[:2])
+                  or entry.get('source') or 'unknown')
+        if entry.get('template'):
+            origin += f' ({entry["template"]})'
+        shape['sources'][origin] += 1
+    ranked = sorted(
+        shapes.items(), key=lambda item: item[1]['total_ms'], reverse=True
+    )
+    return [
+        {
+            'sql': sql,
+            'count': shape['count'],
+            'total_ms': round(shape['total_ms'], 3),
+            'mean_ms': round(shape['total_ms'] / shape['count'], 3),
+            'max_ms': shape['max_ms'],
+            'sources': sorted(
+                shape['sources'].items(), key=lambda item: -item[1]
+            ),
+        }
+        for sql, shape in ranked[:top]
+    ]
@@ -1,6 +1,24 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
 from http import HTTPStatus
+from io import StringIO
 
-from django.test import Client, TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .metrics import Registry, registry, render
+from .middleware import NPlusOneMiddleware
+from .nplusone import RepeatedQueriesError, RepeatedQueriesWarning
+from .profiling import rotate
+from .slow_sql import normalize
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -11,3 +29,296 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def test_disabled_by_default(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_server_timing_header_and_log(self):
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            response = Client().get(
+                reverse('posts:profile', args=[self.user.username])
+            )
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'thumb;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['status'], HTTPStatus.OK)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['render_ms'], 0)
+        self.assertIn(f'desc="{record["queries"]} SQL"', timing)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_disabled_by_default(self):
+        response = Client().get('/metrics')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(METRICS=True)
+    def test_endpoint_closed_for_other_addresses(self):
+        remote = {'REMOTE_ADDR': '203.0.113.7'}
+        response = Client().get('/metrics', **remote)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        response = client.get('/metrics', **remote)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(METRICS=True)
+    def test_endpoint_reports_views_and_cache(self):
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        for line in (
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            'yatube_responses_total{status="200",view="posts:index"} 2',
+            'yatube_cache_requests_total{cache="index_page",result="hit"} 1',
+            'yatube_cache_requests_total{cache="index_page",result="miss"} 1',
+            'yatube_requests_in_flight 1',
+            '# TYPE yatube_thumbnails_generated_total counter',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_threads_do_not_lose_increments(self):
+        local = Registry()
+
+        def work():
+            for _ in range(1000):
+                local.inc('yatube_db_queries_total', view='posts:index')
+                local.observe('yatube_request_duration_seconds', 0.01,
+                              view='posts:index')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        text = render(local)
+        self.assertIn(
+            'yatube_db_queries_total{view="posts:index"} 8000', text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 8000',
+            text,
+        )
+
+    def dead_worker(self, directory, pid):
+        """Снимок завершившегося процесса pid в directory."""
+        worker = Registry(directory=directory)
+        worker.inc('yatube_db_queries_total', 3, view='posts:index')
+        worker.add('yatube_requests_in_flight', 2)
+        worker.flush(force=True)
+        path = worker._path()
+        with open(path) as file:
+            snapshot = json.load(file)
+        os.remove(path)
+        snapshot['pid'] = pid
+        name = f'process-{pid}-{worker.token}.json'
+        with open(os.path.join(directory, name), 'w') as file:
+            json.dump(snapshot, file)
+
+    def test_processes_are_summed_through_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.dead_worker(directory, 2 ** 22 + 1)
+
+        collector = Registry(directory=directory)
+        collector.inc('yatube_db_queries_total', 4, view='posts:index')
+        for _ in range(2):
+            text = render(collector)
+            self.assertIn(
+                'yatube_db_queries_total{view="posts:index"} 7', text
+            )
+            self.assertNotIn('yatube_requests_in_flight 2', text)
+        # Снимок завершившегося процесса перенесён в архив.
+        self.assertEqual(
+            sorted(os.listdir(directory)), ['archive.json', 'metrics.lock']
+        )
+
+    def test_reused_pid_does_not_overwrite_snapshot(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        # Прежний процесс с тем же номером, что у текущего.
+        self.dead_worker(directory, os.getpid())
+
+        worker = Registry(directory=directory)
+        worker.inc('yatube_db_queries_total', 1, view='posts:index')
+        worker.flush(force=True)
+        self.assertNotIn(f'process-{os.getpid()}-', ''.join(
+            name for name in os.listdir(directory)
+            if worker.token not in name
+        ))
+        text = render(worker)
+        self.assertIn('yatube_db_queries_total{view="posts:index"} 4', text)
+        self.assertNotIn('yatube_requests_in_flight 2', text)
+
+
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.settings = override_settings(
+            PROFILER=True, PROFILER_DIR=self.directory
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_staff_request_writes_profile(self):
+        response = self.client_for(self.staff).get(
+            reverse('posts:index'), {'profile': '1'}
+        )
+        name = response['X-Profile']
+        self.assertIn('posts.index', name)
+        base = os.path.join(self.directory, name)
+        self.assertTrue(os.path.exists(base + '.pstats'))
+        with open(base + '.collapsed') as file:
+            stack, value = file.readline().rsplit(' ', 1)
+        self.assertTrue(stack)
+        self.assertGreater(int(value), 0)
+
+    def test_flag_ignored_for_other_users(self):
+        response = self.client_for(self.user).get(
+            reverse('posts:index'), HTTP_X_PROFILE='1'
+        )
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0, PROFILER_SLOW_MS=0)
+    def test_sampled_slow_request_is_saved(self):
+        Client().get(reverse('posts:index'))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_rotation_keeps_latest(self):
+        for num in range(4):
+            base = os.path.join(self.directory, f'profile-{num}')
+            for suffix in ('.pstats', '.collapsed'):
+                with open(base + suffix, 'w'):
+                    pass
+            os.utime(base + '.pstats', (num, num))
+        rotate(self.directory, keep=2)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['profile-2.collapsed', 'profile-2.pstats',
+             'profile-3.collapsed', 'profile-3.pstats'],
+        )
+
+
+class SlowQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.slow_sql'):
+                Client().get(reverse('posts:index'))
+
+    @override_settings(SLOW_SQL_MS=0)
+    def test_queries_logged_with_source(self):
+        with self.assertLogs('core.slow_sql', 'WARNING') as logs:
+            Client().get(reverse('posts:profile', args=['author']))
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        profile = [
+            entry for entry in entries
+            if entry['source'].startswith(os.path.join('posts', 'views.py'))
+        ]
+        self.assertTrue(profile)
+        self.assertIn('in profile', profile[0]['source'])
+        self.assertIn("'author'", profile[0]['params'])
+        self.assertGreaterEqual(profile[0]['duration_ms'], 0)
+
+    def test_normalize_merges_literals_and_lists(self):
+        self.assertEqual(
+            normalize('SELECT * FROM t WHERE id IN (%s, %s, %s)  AND a = 5'),
+            normalize("SELECT * FROM t WHERE id IN (%s) AND a = 'x'"),
+        )
+
+    def test_report_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'slow_sql.log')
+        entries = [
+            ('SELECT COUNT(*) FROM post WHERE author_id = %s', 30,
+             'posts/views.py:60 in profile'),
+            ('SELECT COUNT(*) FROM post WHERE author_id = %s', 20,
+             'posts/views.py:60 in profile'),
+            ('SELECT * FROM post WHERE id IN (%s, %s)', 10,
+             'posts/views.py:30 in index'),
+        ]
+        with open(path, 'w', encoding='utf-8') as file:
+            for sql, duration, source in entries:
+                file.write(json.dumps({
+                    'duration_ms': duration, 'sql': sql, 'params': '()',
+                    'source': source, 'template': None,
+                }) + '\n')
+        out = StringIO()
+        call_command('slow_sql_report', log=path, json=True, stdout=out)
+        shapes = json.loads(out.getvalue())
+        self.assertEqual(len(shapes), 2)
+        self.assertEqual(shapes[0]['count'], 2)
+        self.assertEqual(shapes[0]['total_ms'], 50)
+        self.assertEqual(
+            shapes[0]['sources'], [['posts/views.py:60 in profile', 2]]
+        )
+
+
+class NPlusOneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for num in range(6):
+            User.objects.create_user(username=f'user_{num}')
+
+    def view(self, lookups):
+        def view(request):
+            for pk in User.objects.values_list('pk', flat=True)[:lookups]:
+                User.objects.get(pk=pk)
+            return HttpResponse()
+        return NPlusOneMiddleware(view)
+
+    def test_raises_in_tests(self):
+        with self.assertRaisesMessage(RepeatedQueriesError, '5 × SELECT'):
+            self.view(5)(RequestFactory().get('/'))
+
+    def test_below_threshold_passes(self):
+        response = self.view(4)(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(NPLUSONE_IGNORE={'/ignored/': ('"auth_user"',)})
+    def test_ignore_applies_to_listed_view_only(self):
+        response = self.view(5)(RequestFactory().get('/ignored/'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        with self.assertRaises(RepeatedQueriesError):
+            self.view(5)(RequestFactory().get('/'))
+
+    @override_settings(NPLUSONE_MODE='warn')
+    def test_warns_outside_tests(self):
+        with self.assertWarns(RepeatedQueriesWarning) as caught:
+            self.view(6)(RequestFactory().get('/'))
+        self.assertIn('core/test.py', str(caught.warning))
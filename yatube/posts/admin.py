@@ -1,30 +1,64 @@
+from django.conf import settings
 from django.contrib import admin
 
 from .models import Group, Post, Comment, Follow
+from .paginators import AdminPaginator
+from .search import get_backend
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без точного подсчёта строк таблицы."""
+    paginator = AdminPaginator
+    show_full_result_count = False
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+class PostAdmin(LargeTableAdmin):
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'comments_count'
+    )
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_editable = ('group',)
     list_filter = ('pub_date',)
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    ordering = ('-pub_date', '-id')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт через полнотекстовый индекс, а не через
+        # LIKE '%...%' по всей таблице.
+        if not search_term:
+            return queryset, False
+        ids = get_backend().search(
+            search_term, limit=settings.SEARCH_MAX_RESULTS
+        )
+        return queryset.filter(pk__in=ids), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description',)
     list_display_links = ('title',)
+    search_fields = ('title', 'slug')
     prepopulated_fields = {"slug": ("title",)}
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = search_fields = ('post', 'author', 'text', 'created')
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('post', 'author', 'text', 'created')
+    list_select_related = ('post', 'author')
+    # Поиск по тексту комментария был бы LIKE по всей таблице.
+    search_fields = ('=author__username',)
     list_filter = ('created',)
+    raw_id_fields = ('post', 'author')
+    ordering = ('-created', '-id')
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
-    list_display = search_fields = ('user', 'author')
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    raw_id_fields = ('user', 'author')
+    ordering = ('-id',)
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.http import JsonResponse
+
+from .models import Group, Post, User
+from .paginators import CursorPaginator
+
+MAX_LIMIT = 100
+# Поле ответа -> пути .values() относительно Post. Поля из нескольких
+# путей собираются функцией из CONVERTERS.
+FIELDS = {
+    'id': ('id',),
+    'pub_date': ('pub_date',),
+    'author': ('author__username',),
+    'group': ('group__slug',),
+    'text': ('text',),
+    'comments_count': ('comments_count',),
+    'image': ('thumbnail_url', 'thumbnail_width', 'thumbnail_height'),
+}
+# Без fields= текст поста не загружается: ленте в приложении хватает
+# заголовочных полей, а текст запрашивается явно.
+DEFAULT_FIELDS = ('id', 'pub_date', 'author', 'group', 'comments_count',
+                  'image')
+
+
+def _image(url, width, height):
+    if not url:
+        return None
+    return {'url': url, 'width': width, 'height': height}
+
+
+CONVERTERS = {'image': _image}
+
+
+class FieldsError(ValueError):
+    """Параметр fields= с неизвестным полем."""
+
+
+def parse_fields(value):
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown or not fields:
+        raise FieldsError(
+            'Неизвестные поля: {}. Доступны: {}.'.format(
+                ', '.join(unknown) or '—', ', '.join(FIELDS)
+            )
+        )
+    return fields
+
+
+def _serialize(row, fields, prefix):
+    item = {}
+    for name in fields:
+        values = [row[prefix + path] for path in FIELDS[name]]
+        converter = CONVERTERS.get(name)
+        item[name] = converter(*values) if converter else values[0]
+    return item
+
+
+def _page_url(request, **cursor):
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query.update(cursor)
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def feed_response(request, queryset, key=('pub_date', 'id'), prefix=''):
+    """JSON-страница ленты: выбранные поля и курсоры соседних страниц.
+
+    Строки читаются через .values() только нужных столбцов, модели
+    не создаются. prefix — путь к посту от модели queryset.
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except FieldsError as error:
+        return _error(str(error), 400)
+    try:
+        limit = int(request.GET.get('limit', settings.NUMBER_POST))
+    except ValueError:
+        return _error('limit должен быть числом.', 400)
+    limit = min(max(limit, 1), MAX_LIMIT)
+    columns = {prefix + path for name in fields for path in FIELDS[name]}
+    columns.update(key)
+    paginator = CursorPaginator(
+        queryset.values(*columns),
+        limit,
+        key=key,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    page = paginator.get_page()
+    return JsonResponse({
+        'results': [_serialize(row, fields, prefix) for row in page],
+        'next': (_page_url(request, after=paginator.next_cursor)
+                 if paginator.next_cursor else None),
+        'previous': (_page_url(request, before=paginator.previous_cursor)
+                     if paginator.previous_cursor else None),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return _error('Группа не найдена.', 404)
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return _error('Пользователь не найден.', 404)
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error('Требуется вход.', 401)
+    return feed_response(
+        request,
+        request.user.timeline.all(),
+        key=('pub_date', 'post_id'),
+        prefix='post__',
+    )
@@ -0,0 +1,26 @@
+from itertools import islice
+
+BATCH_SIZE = 1000
+
+
+def batched(iterable, size=BATCH_SIZE):
+    """Разбить поток на списки не длиннее size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_create_batched(model, objects, batch_size=BATCH_SIZE, **kwargs):
+    """bulk_create для потока объектов без загрузки его целиком в память.
+
+    Размер одного INSERT Django по-прежнему ограничивает сам с учётом
+    возможностей СУБД. Возвращает количество записанных объектов.
+    """
+    created = 0
+    for batch in batched(objects, batch_size):
+        model.objects.bulk_create(batch, **kwargs)
+        created += len(batch)
+    return created
@@ -0,0 +1,101 @@
+import math
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .generator import DataGenerator
+from .models import Group, Post, UserCounters
+
+
+def seed(users=100, groups=10, posts=1000, comments=2000,
+         follows_per_user=5, random_seed=0):
+    """Заполнить базу данными для замеров и вернуть счётчики строк."""
+    return DataGenerator(prefix='bench', seed=random_seed).generate(
+        users=users,
+        groups=groups,
+        posts=posts,
+        comments=comments,
+        follows_per_user=follows_per_user,
+    )
+
+
+def scenarios():
+    """Запросы к представлениям: (имя, метод, url, данные, пользователь)."""
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = UserCounters.objects.order_by('-posts_count').first().user
+    reader = UserCounters.objects.order_by('-following_count').first().user
+    post = Post.objects.order_by('-comments_count').first()
+    return (
+        ('index', 'get', reverse('posts:index'), None, None),
+        ('group_posts', 'get',
+         reverse('posts:group_list', args=[group.slug]), None, None),
+        ('profile', 'get',
+         reverse('posts:profile', args=[author.username]), None, None),
+        ('post_detail', 'get',
+         reverse('posts:post_detail', args=[post.pk]), None, None),
+        ('follow_index', 'get', reverse('posts:follow_index'), None, reader),
+        ('api_index', 'get', reverse('posts:api_index'), None, None),
+        ('api_group_posts', 'get',
+         reverse('posts:api_group_list', args=[group.slug]), None, None),
+        ('api_profile', 'get',
+         reverse('posts:api_profile', args=[author.username]), None, None),
+        ('api_follow_index', 'get', reverse('posts:api_follow_index'),
+         None, reader),
+        ('post_create', 'post', reverse('posts:post_create'),
+         {'text': 'Пост из замера'}, reader),
+        ('add_comment', 'post',
+         reverse('posts:add_comment', args=[post.pk]),
+         {'text': 'Комментарий из замера'}, reader),
+    )
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def measure(name, method, url, data, user, requests=20, cold=False):
+    """Замерить представление: задержки, число запросов и пик памяти."""
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    send = getattr(client, method)
+    timings = []
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        response = send(url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            send(url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(requests=20, cold=False):
+    return {
+        name: measure(name, method, url, data, user, requests, cold)
+        for name, method, url, data, user in scenarios()
+    }
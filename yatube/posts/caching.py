@@ -0,0 +1,43 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+FEED_VERSION_KEY = 'feed_version'
+
+
+def get_feed_version():
+    """Текущая версия лент, входящая в ключи закешированных страниц."""
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def bump_feed_version():
+    """Сделать недоступными все закешированные страницы лент.
+
+    Если версия вытеснена из кеша, она создаётся заново из текущего
+    времени и поэтому не совпадёт ни с одной из прежних.
+    """
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.add(FEED_VERSION_KEY, time.time_ns(), None)
+
+
+def feed_page_key(prefix, request, pages):
+    """Ключ закешированной страницы ленты или None, если её не кешировать.
+
+    Ключ строится из разобранного курсора pages, а не из строки
+    запроса, и имеет постоянную длину. Страница с испорченным курсором
+    не кешируется: иначе каждый мусорный ?after= занимал бы запись.
+    """
+    cursor = pages.after or pages.before
+    if cursor is None and (request.GET.get('after')
+                           or request.GET.get('before')):
+        return None
+    direction = 'after' if pages.after else 'before' if pages.before else ''
+    digest = hashlib.md5(repr(cursor).encode()).hexdigest()
+    return f'{prefix}:{get_feed_version()}:{direction}:{digest}'
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.metrics import record_cache
+
+from .thumbnails import prefetch_thumbnails
+
+CARD_TEMPLATE = 'posts/includes/post_for_list.html'
+
+
+def card_key(post):
+    """Ключ карточки из всех выводимых в ней полей.
+
+    Post.updated сюда не входит: его сдвигает каждый комментарий,
+    а карточка комментариев не показывает.
+    """
+    version = (
+        post.text,
+        post.pub_date,
+        post.author.username,
+        post.author.get_full_name(),
+        post.group.slug if post.group_id else None,
+        post.image.name,
+        post.thumbnail_url,
+        post.thumbnail_width,
+        post.thumbnail_height,
+        post.thumbnail_srcset,
+    )
+    digest = hashlib.md5(repr(version).encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def prefetch_cards(posts):
+    """Подставить постам страницы готовые карточки в post.card.
+
+    Карточки читаются из кеша одним get_many и общие для всех лент.
+    Недостающие отрисовываются (миниатюры для них подбираются
+    пакетно) и записываются одним set_many.
+    """
+    keys = {card_key(post): post for post in posts}
+    cached = cache.get_many(list(keys))
+    missing = {}
+    for key, post in keys.items():
+        record_cache('post_card', key in cached)
+        if key in cached:
+            post.card = mark_safe(cached[key])
+        else:
+            missing[key] = post
+    if not missing:
+        return
+    prefetch_thumbnails(missing.values())
+    rendered = {
+        key: render_to_string(CARD_TEMPLATE, {'post': post})
+        for key, post in missing.items()
+    }
+    cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    for key, html in rendered.items():
+        missing[key].card = mark_safe(html)
@@ -0,0 +1,113 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.views.decorators.http import condition
+
+from .models import Follow, Group, Post, User
+from .paginators import CursorPaginator
+
+# Поля поста, от которых зависит его карточка в ленте: updated сдвигают
+# правка и комментарии, миниатюры заполняются без сохранения модели.
+CARD_FIELDS = ('id', 'updated', 'thumbnail_url', 'thumbnail_srcset')
+
+
+def _viewer(request):
+    """Часть страницы, зависящая от посетителя.
+
+    Шапка и формы различаются для пользователей, а в форму вшит
+    CSRF-токен: после входа cookie меняется, и старая страница
+    отправила бы устаревший токен.
+    """
+    if not request.user.is_authenticated:
+        return (None,)
+    return (request.user.pk,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+
+
+def validated(compute):
+    """Условный GET для представления по валидатору compute.
+
+    compute(request, *args, **kwargs) одним лёгким запросом возвращает
+    части ETag либо None, если объекта нет — тогда представление
+    выполняется и отвечает 404 само. При совпадении If-None-Match ответ
+    304 отдаётся без основных запросов и отрисовки шаблона.
+    Last-Modified не отдаётся: страница зависит от посетителя
+    и счётчиков автора, а дата изменения поста от них не зависит.
+    """
+    def etag(request, *args, **kwargs):
+        validator = compute(request, *args, **kwargs)
+        if validator is None:
+            return None
+        parts = (compute.__name__, *_viewer(request), *validator)
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    return condition(etag_func=etag)
+
+
+def _page_rows(request, posts, *fields):
+    """Строки запрошенной страницы ленты без отрисовки.
+
+    Это тот же индексированный запрос, что и у страницы, поэтому ETag
+    меняется сразу после записи в любом рабочем процессе: база у них
+    общая, а кеш может быть своим у каждого.
+    """
+    pages = CursorPaginator(
+        posts, settings.NUMBER_POST,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return tuple(pages.page_queryset().values_list(*CARD_FIELDS, *fields))
+
+
+def _viewer_follows(request, author):
+    return Exists(Follow.objects.filter(
+        user=request.user, author=OuterRef(author)
+    ))
+
+
+def post_detail(request, post_id):
+    """Дата изменения поста (её сдвигают и комментарии) и шапка автора."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author__username', 'author__first_name',
+        'author__last_name', 'author__counters__posts_count',
+        'group__slug', 'group__title',
+    ).first()
+    return row
+
+
+def group_posts(request, slug):
+    """Посты страницы с именами авторов и описание группы."""
+    rows = _page_rows(
+        request, Post.objects.filter(group__slug=slug),
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__title', 'group__description',
+    )
+    if rows:
+        return rows
+    # У пустой группы описание читается отдельным запросом.
+    return Group.objects.filter(slug=slug).values_list(
+        'pk', 'title', 'description'
+    ).first()
+
+
+def profile(request, username):
+    """Посты страницы, счётчики автора и подписка посетителя на него."""
+    fields = ['first_name', 'last_name', 'counters__posts_count',
+              'counters__followers_count', 'counters__following_count']
+    posts = Post.objects.filter(author__username=username)
+    users = User.objects.filter(username=username)
+    extra = []
+    if request.user.is_authenticated:
+        posts = posts.annotate(
+            viewer_follows=_viewer_follows(request, 'author')
+        )
+        users = users.annotate(viewer_follows=_viewer_follows(request, 'pk'))
+        extra.append('viewer_follows')
+    rows = _page_rows(
+        request, posts, 'group__slug',
+        *(f'author__{field}' for field in fields), *extra,
+    )
+    if rows:
+        return rows
+    return users.values_list('pk', *fields, *extra).first()
@@ -0,0 +1,136 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .batching import BATCH_SIZE
+from .models import Comment, Follow, Post, User, UserCounters
+
+USER_COUNTERS = ('posts_count', 'followers_count', 'following_count')
+
+
+def _count(queryset, field):
+    """Подзапрос с количеством строк queryset, связанных по field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def with_exact_counters(users):
+    return users.annotate(
+        exact_posts_count=_count(Post.objects.all(), 'author'),
+        exact_followers_count=_count(Follow.objects.all(), 'author'),
+        exact_following_count=_count(Follow.objects.all(), 'user'),
+    )
+
+
+def _shift(field, delta):
+    # Уже разошедшийся счётчик не уходит в минус; его поправит
+    # reconcile_counters.
+    return Greatest(F(field) + delta, 0)
+
+
+def change_user_counters(user_id, **deltas):
+    """Атомарно изменить счётчики пользователя на deltas.
+
+    Недостающая строка создаётся только при увеличении: уменьшение
+    приходит и при каскадном удалении самого пользователя.
+    """
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{field: _shift(field, delta) for field, delta in deltas.items()}
+    )
+    if not updated and min(deltas.values()) > 0:
+        _create_counters(user_id)
+
+
+def change_comments_count(post_id, delta):
+    # Комментарии входят в страницу поста, поэтому меняют и её дату
+    # изменения (валидатор условных запросов).
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_shift('comments_count', delta),
+        updated=timezone.now(),
+    )
+
+
+def _create_counters(user_id):
+    user = with_exact_counters(User.objects.filter(pk=user_id)).first()
+    if user is None:
+        return None
+    counters, _ = UserCounters.objects.get_or_create(
+        user_id=user_id,
+        defaults={
+            field: getattr(user, f'exact_{field}') for field in USER_COUNTERS
+        },
+    )
+    return counters
+
+
+def get_counters(user):
+    """Счётчики пользователя; недостающая строка создаётся один раз."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return _create_counters(user.pk)
+
+
+def reconcile(batch_size=BATCH_SIZE):
+    """Исправить расхождения счётчиков с данными, обходя таблицы пачками.
+
+    Возвращает количество исправленных строк.
+    """
+    fixed = 0
+    users = with_exact_counters(User.objects.order_by('pk')).select_related(
+        'counters'
+    )
+    for batch in _batches(users, batch_size):
+        missing, drifted = [], []
+        for user in batch:
+            exact = {
+                field: getattr(user, f'exact_{field}')
+                for field in USER_COUNTERS
+            }
+            try:
+                counters = user.counters
+            except UserCounters.DoesNotExist:
+                missing.append(UserCounters(user=user, **exact))
+                continue
+            if any(getattr(counters, f) != v for f, v in exact.items()):
+                for field, value in exact.items():
+                    setattr(counters, field, value)
+                drifted.append(counters)
+        UserCounters.objects.bulk_create(missing, ignore_conflicts=True)
+        UserCounters.objects.bulk_update(drifted, USER_COUNTERS)
+        fixed += len(missing) + len(drifted)
+
+    posts = Post.objects.order_by('pk').only('comments_count').annotate(
+        exact_comments_count=_count(Comment.objects.all(), 'post')
+    )
+    for batch in _batches(posts, batch_size):
+        drifted = [
+            post for post in batch
+            if post.comments_count != post.exact_comments_count
+        ]
+        for post in drifted:
+            post.comments_count = post.exact_comments_count
+            post.updated = timezone.now()
+        Post.objects.bulk_update(drifted, ['comments_count', 'updated'])
+        fixed += len(drifted)
+    return fixed
+
+
+def _batches(queryset, batch_size):
+    """Пачки строк по возрастанию pk без OFFSET."""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
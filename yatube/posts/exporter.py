@@ -0,0 +1,173 @@
+import csv
+import datetime as dt
+import json
+import zlib
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .importer import KINDS
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Поля совпадают с форматом import_content, поэтому выгрузку можно
+# загрузить обратно. Значения — пути к полям для values_list.
+COLUMNS = {
+    'posts': {
+        'id': 'id',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    },
+    'comments': {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    'follows': {
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+}
+MODELS = {'posts': Post, 'comments': Comment, 'follows': Follow}
+FILTERS = {
+    'posts': {
+        'author': 'author__username',
+        'group': 'group__slug',
+        'date': 'pub_date',
+    },
+    'comments': {
+        'author': 'author__username',
+        'group': 'post__group__slug',
+        'date': 'created',
+    },
+    'follows': {
+        'author': 'author__username',
+    },
+}
+
+
+def parse_bound(value):
+    """Граница периода из «ГГГГ-ММ-ДД» или даты со временем ISO 8601."""
+    if value in (None, ''):
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Некорректная дата: {value}')
+        moment = dt.datetime.combine(day, dt.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_queryset(kind, author=None, group=None, since=None, until=None):
+    """Строки выгрузки kind по возрастанию ключа.
+
+    since включается в период, until — нет. Фильтр, не применимый
+    к виду данных (группа или даты у подписок), вызывает ValueError.
+    """
+    if kind not in KINDS:
+        raise ValueError(f'Неизвестный вид данных: {kind}')
+    fields = FILTERS[kind]
+    conditions = {}
+    for name, value, lookup in (
+        ('author', author, ''),
+        ('group', group, ''),
+        ('date', since, '__gte'),
+        ('date', until, '__lt'),
+    ):
+        if value in (None, ''):
+            continue
+        if name not in fields:
+            raise ValueError(f'Выгрузку {kind} нельзя фильтровать по {name}')
+        conditions[fields[name] + lookup] = value
+    return (
+        MODELS[kind].objects.filter(**conditions)
+        .order_by('pk')
+        .values_list(*COLUMNS[kind].values())
+    )
+
+
+def _value(value):
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    return value
+
+
+def rows(queryset, kind, chunk_size=CHUNK_SIZE):
+    """Словари строк; в памяти не больше chunk_size строк сразу."""
+    names = list(COLUMNS[kind])
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield dict(zip(names, map(_value, row)))
+
+
+class _Line:
+    """Файл для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def lines(records, kind, file_format):
+    """Строки JSONL или CSV (с заголовком) для словарей records."""
+    if file_format == 'jsonl':
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+        return
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS[kind])
+    for record in records:
+        yield writer.writerow(
+            '' if value is None else value for value in record.values()
+        )
+
+
+def chunks(parts, compress=False, size=BUFFER_SIZE):
+    """Склеить строки в блоки байтов около size, при compress — gzip."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer, buffered = [], 0
+    for part in parts:
+        data = part.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if buffered < size:
+            continue
+        block = b''.join(buffer)
+        buffer, buffered = [], 0
+        if compressor is not None:
+            block = compressor.compress(block)
+        if block:
+            yield block
+    block = b''.join(buffer)
+    if compressor is not None:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+def stream(kind, file_format='jsonl', compress=False,
+           chunk_size=CHUNK_SIZE, **filters):
+    """Выгрузка kind блоками байтов с постоянным расходом памяти."""
+    if file_format not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {file_format}')
+    queryset = export_queryset(kind, **filters)
+    return chunks(
+        lines(rows(queryset, kind, chunk_size), kind, file_format),
+        compress,
+    )
+
+
+def filename(kind, file_format, compress=False):
+    return f'{kind}.{file_format}' + ('.gz' if compress else '')
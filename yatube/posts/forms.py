@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
 
+from .images import normalize_image
 from .models import Post, Comment
 
 
@@ -8,6 +11,17 @@ class PostForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['group'].empty_label = "Группа не выбрана"
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            return normalize_image(image)
+        except (OSError, Image.DecompressionBombError):
+            raise forms.ValidationError(
+                'Не удалось обработать изображение.'
+            )
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image',)
@@ -0,0 +1,252 @@
+import datetime as dt
+import io
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from PIL import Image
+
+from . import counters, search, timeline
+from .batching import BATCH_SIZE, bulk_create_batched
+from .caching import bump_feed_version
+from .models import Comment, Follow, Group, Post, User
+from .thumbnails import thumbnail_fields
+
+WORDS = (
+    'лента', 'подписка', 'автор', 'группа', 'пост', 'новость', 'день',
+    'город', 'музыка', 'книга', 'фото', 'прогулка', 'кофе', 'вечер',
+    'работа', 'отпуск', 'идея', 'проект', 'погода', 'друзья', 'кино',
+    'сегодня', 'вчера', 'завтра', 'очень', 'снова', 'наконец', 'хорошо',
+)
+START_DATE = dt.datetime(2020, 1, 1, tzinfo=timezone.utc)
+IMAGE_SIZE = (960, 640)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволить bulk_create записать свои значения в поля auto_now_add."""
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+class IdRange:
+    """Ключи строк, созданных одной вставкой.
+
+    Если ключи идут подряд, список не хранится и выбор не зависит
+    от объёма данных.
+    """
+
+    def __init__(self, queryset):
+        bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+        self.first, self.last = bounds['first'], bounds['last']
+        self.total = queryset.count()
+        self.ids = None
+        if self.total and self.last - self.first + 1 != self.total:
+            self.ids = list(queryset.values_list('pk', flat=True))
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if self.ids is not None:
+            return self.ids[index]
+        return self.first + index
+
+    def choice(self, rng):
+        return self[rng.randrange(self.total)]
+
+
+class DataGenerator:
+    """Воспроизводимое заполнение базы синтетическими данными.
+
+    Строки создаются пачками по batch_size из генераторов, поэтому
+    расход памяти не зависит от объёма данных. Подписки распределены
+    по степенному закону: у немногих авторов много подписчиков.
+    """
+
+    def __init__(self, prefix='gen', seed=0, batch_size=BATCH_SIZE,
+                 progress=None):
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda model, created: None)
+
+    def _create(self, model, objects):
+        created = bulk_create_batched(model, objects, self.batch_size)
+        self.progress(model, created)
+        return created
+
+    def _text(self, words):
+        return ' '.join(
+            self.rng.choice(WORDS) for _ in range(words)
+        ).capitalize() + '.'
+
+    def _date(self, span_days):
+        return START_DATE + dt.timedelta(
+            seconds=self.rng.randrange(span_days * 24 * 60 * 60)
+        )
+
+    def check_prefix(self):
+        """ValueError, если пользователи или группы с префиксом уже есть."""
+        if (User.objects.filter(username__startswith=f'{self.prefix}_')
+                .exists()
+                or Group.objects.filter(slug__startswith=f'{self.prefix}-')
+                .exists()):
+            raise ValueError(
+                f'Префикс {self.prefix} уже занят данными прошлого запуска, '
+                'укажите другой.'
+            )
+
+    def users(self, count):
+        last = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        self._create(User, (
+            User(
+                username=f'{self.prefix}_{num}',
+                first_name='Автор',
+                last_name=str(num),
+                password=UNUSABLE_PASSWORD_PREFIX,
+            )
+            for num in range(count)
+        ))
+        return IdRange(User.objects.filter(
+            pk__gt=last, username__startswith=f'{self.prefix}_'
+        ))
+
+    def groups(self, count):
+        last = Group.objects.aggregate(last=Max('pk'))['last'] or 0
+        self._create(Group, (
+            Group(
+                title=f'Группа {num}',
+                slug=f'{self.prefix}-{num}',
+                description=self._text(12),
+            )
+            for num in range(count)
+        ))
+        return IdRange(Group.objects.filter(
+            pk__gt=last, slug__startswith=f'{self.prefix}-'
+        ))
+
+    def images(self, count):
+        """Набор картинок, общий для постов, вместе с миниатюрами."""
+        pool = []
+        for num in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'JPEG')
+            name = default_storage.save(
+                f'posts/{self.prefix}_{num}.jpg',
+                ContentFile(buffer.getvalue()),
+            )
+            pool.append(
+                {'image': name, **thumbnail_fields(Post(image=name).image)}
+            )
+        return pool
+
+    def posts(self, count, users, groups, images=(), span_days=365):
+        """Посты случайных авторов, у десятой части — картинка из images."""
+        def build():
+            if not len(users):
+                return
+            for _ in range(count):
+                image = {}
+                if images and self.rng.random() < 0.1:
+                    image = self.rng.choice(images)
+                group_id = None
+                if len(groups) and self.rng.random() < 0.7:
+                    group_id = groups.choice(self.rng)
+                yield Post(
+                    author_id=users.choice(self.rng),
+                    group_id=group_id,
+                    text=self._text(self.rng.randint(5, 60)),
+                    pub_date=self._date(span_days),
+                    **image
+                )
+
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            self._create(Post, build())
+        return IdRange(Post.objects.filter(pk__gt=last))
+
+    def comments(self, count, users, posts, span_days=365):
+        def build():
+            if not len(posts):
+                return
+            for _ in range(count):
+                yield Comment(
+                    post_id=posts.choice(self.rng),
+                    author_id=users.choice(self.rng),
+                    text=self._text(self.rng.randint(3, 20)),
+                    created=self._date(span_days),
+                )
+
+        with explicit_dates(Comment._meta.get_field('created')):
+            return self._create(Comment, build())
+
+    def _popular_author(self, users):
+        # Равномерный логарифм номера даёт закон Ципфа с показателем 1.
+        return users[int(len(users) ** self.rng.random()) - 1]
+
+    def follows(self, users, per_user):
+        """Подписки: в среднем per_user на пользователя."""
+        def build():
+            for index in range(len(users)):
+                user_id = users[index]
+                wanted = min(
+                    round(self.rng.expovariate(1 / per_user)),
+                    len(users) - 1,
+                )
+                authors = set()
+                attempts = 0
+                while len(authors) < wanted and attempts < wanted * 10:
+                    attempts += 1
+                    author_id = self._popular_author(users)
+                    if author_id != user_id:
+                        authors.add(author_id)
+                for author_id in sorted(authors):
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        if not per_user or len(users) < 2:
+            return 0
+        return self._create(Follow, build())
+
+    def generate(self, users=1000, groups=20, posts=10000, comments=20000,
+                 follows_per_user=10, images=0):
+        """Создать данные и пересчитать производные таблицы.
+
+        Возвращает количество созданных строк каждого вида. Если префикс
+        уже использован, ничего не создаётся и поднимается ValueError.
+        """
+        self.check_prefix()
+        user_ids = self.users(users)
+        group_ids = self.groups(groups)
+        image_pool = self.images(images)
+        post_ids = self.posts(posts, user_ids, group_ids, image_pool)
+        created = {
+            'users': len(user_ids),
+            'groups': len(group_ids),
+            'posts': len(post_ids),
+            'comments': self.comments(comments, user_ids, post_ids),
+            'follows': self.follows(user_ids, follows_per_user),
+        }
+        # bulk_create не отправляет сигналы, поэтому счётчики, ленты
+        # подписок и поисковый индекс пересчитываются целиком. Таблицы
+        # лент и индекса очищаются и заполняются в одной транзакции,
+        # чтобы читатели не видели их пустыми.
+        counters.reconcile(self.batch_size)
+        with transaction.atomic():
+            timeline.rebuild(self.batch_size)
+        with transaction.atomic():
+            search.get_backend().rebuild(self.batch_size)
+        bump_feed_version()
+        return created
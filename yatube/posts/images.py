@@ -0,0 +1,68 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image, ImageOps, features
+
+FORMATS = {
+    'WEBP': ('.webp', 'image/webp'),
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+}
+
+
+def output_format(has_alpha):
+    """Формат сохранения картинки с учётом возможностей Pillow."""
+    image_format = settings.POST_IMAGE_FORMAT
+    if image_format == 'WEBP' and not features.check('webp'):
+        image_format = 'JPEG'
+    if image_format == 'JPEG' and has_alpha:
+        image_format = 'PNG'
+    return image_format
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def normalize_image(upload):
+    """Привести загруженную картинку к размеру и формату для хранения.
+
+    Картинка уменьшается до POST_IMAGE_MAX_SIZE (для JPEG декодируется
+    сразу в уменьшенном масштабе), поворачивается по EXIF и
+    пересохраняется без метаданных. Анимированные картинки
+    не изменяются.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    image.draft('RGB', max_size)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(max_size, Image.LANCZOS)
+
+    has_alpha = _has_alpha(image)
+    image_format = output_format(has_alpha)
+    if image_format == 'PNG':
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    else:
+        image = image.convert(
+            'RGBA' if has_alpha and image_format == 'WEBP' else 'RGB'
+        )
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        quality=settings.POST_IMAGE_QUALITY,
+        optimize=True,
+    )
+    extension, content_type = FORMATS[image_format]
+    name = os.path.splitext(os.path.basename(upload.name))[0] + extension
+    return InMemoryUploadedFile(
+        buffer, 'image', name, content_type, buffer.tell(), None
+    )
@@ -0,0 +1,453 @@
+import csv
+import json
+import os
+import time
+from collections import OrderedDict
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, search, timeline
+from .batching import BATCH_SIZE, batched
+from .caching import bump_feed_version
+from .generator import explicit_dates
+from .models import (Comment, Follow, Group, ImportCheckpoint, ImportedPost,
+                     Post, User)
+
+KINDS = ('posts', 'comments', 'follows')
+CHECKPOINT_FIELDS = ('read', 'imported', 'skipped', 'offset')
+USER_CACHE_SIZE = 100_000
+LOOKUP_CHUNK = 500
+
+
+class RecordError(ValueError):
+    """Запись входного файла, которую нельзя импортировать."""
+
+
+class LookupCache:
+    """Ключи объектов по естественному ключу, не больше maxsize штук.
+
+    Давно не встречавшиеся ключи вытесняются, поэтому память
+    не растёт с объёмом входных данных.
+    """
+
+    def __init__(self, queryset, field, maxsize=USER_CACHE_SIZE,
+                 create=None):
+        self.queryset = queryset
+        self.field = field
+        self.maxsize = maxsize
+        self.create = create
+        self.cache = OrderedDict()
+
+    def _fetch(self, keys):
+        found = {}
+        for chunk in batched(keys, LOOKUP_CHUNK):
+            found.update(
+                self.queryset.filter(**{f'{self.field}__in': chunk})
+                .values_list(self.field, 'pk')
+            )
+        return found
+
+    def resolve(self, keys):
+        """Словарь ключ -> pk для известных (или созданных) ключей.
+
+        Пустые ключи (поле не заполнено) не ищутся и не создаются.
+        """
+        keys = {key for key in keys if key}
+        resolved = {}
+        for key in keys:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                resolved[key] = self.cache[key]
+        missing = keys - set(resolved)
+        found = self._fetch(missing) if missing else {}
+        if self.create is not None and len(found) < len(missing):
+            self.create(missing - set(found))
+            found.update(self._fetch(missing - set(found)))
+        for key, pk in found.items():
+            self.cache[key] = pk
+            resolved[key] = pk
+        while len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return resolved
+
+
+def _valid(model, field, value):
+    """Проходит ли value проверки поля модели: длину и валидаторы."""
+    try:
+        model._meta.get_field(field).clean(value, None)
+    except ValidationError:
+        return False
+    return True
+
+
+def detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(file, file_format, offset=0):
+    """Записи файла, открытого в двоичном режиме, начиная с offset.
+
+    Выдаёт пары (смещение конца записи, словарь полей): смещение можно
+    сохранить и продолжить чтение с него. CSV читается с заголовком
+    из первой строки, записи могут занимать несколько строк.
+    """
+    if file_format == 'jsonl':
+        file.seek(offset)
+        for line in file:
+            offset += len(line)
+            if line.strip():
+                try:
+                    yield offset, json.loads(line)
+                except ValueError as error:
+                    yield offset, RecordError(f'некорректный JSON: {error}')
+        return
+    file.seek(0)
+    header_line = file.readline()
+    header = next(csv.reader([header_line.decode('utf-8-sig')]), [])
+    position = [max(offset, len(header_line))]
+    file.seek(position[0])
+
+    def lines():
+        for line in file:
+            position[0] += len(line)
+            yield line.decode('utf-8')
+
+    for row in csv.DictReader(lines(), fieldnames=header):
+        yield position[0], row
+
+
+def _required(record, field):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        raise RecordError(f'не заполнено поле {field}')
+    return value
+
+
+def _optional_id(record):
+    value = record.get('id')
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError(f'некорректный id: {value!r}')
+
+
+def _existing(queryset, values, field='pk'):
+    """Те из values, что уже есть в queryset."""
+    found = set()
+    for chunk in batched(values, LOOKUP_CHUNK):
+        found.update(
+            queryset.filter(**{f'{field}__in': chunk})
+            .values_list(field, flat=True)
+        )
+    return found
+
+
+def _explicit_ids(records):
+    """Корректные id, заданные в записях; остальные отсеет build."""
+    ids = set()
+    for record in records:
+        try:
+            ids.add(_optional_id(record))
+        except RecordError:
+            pass
+    ids.discard(None)
+    return ids
+
+
+class IdClaims:
+    """Проверка id из источника перед записью пачки.
+
+    Занятый id не перезаписывается и не пропускается молча: запись
+    с ним отклоняется, как и повтор id внутри пачки.
+    """
+
+    def __init__(self, model, records, imported=None):
+        self.taken = _existing(model.objects.all(), _explicit_ids(records))
+        self.imported = set()
+        if imported is not None:
+            self.imported = _existing(imported, self.taken, 'post_id')
+
+    def claim(self, record):
+        pk = _optional_id(record)
+        if pk is None:
+            return None
+        if pk in self.imported:
+            raise RecordError(f'пост {pk} уже импортирован')
+        if pk in self.taken:
+            raise RecordError(f'id {pk} уже занят')
+        self.taken.add(pk)
+        return pk
+
+
+def _date(record, field):
+    value = record.get(field)
+    if value in (None, ''):
+        return timezone.now()
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise RecordError(f'некорректная дата в поле {field}: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class ContentImporter:
+    """Потоковый импорт постов, комментариев и подписок из JSONL и CSV.
+
+    Записи читаются по одной и пишутся пачками по batch_size, каждая
+    пачка — в своей транзакции вместе с контрольной точкой
+    (ImportCheckpoint), поэтому прерванный импорт продолжается ровно
+    с первой незаписанной пачки. Авторы ищутся по username, группы —
+    по slug, посты для комментариев — по id из источника среди постов,
+    записанных импортом (ImportedPost). Записи с ошибками, в том числе
+    с уже занятым id или существующей подпиской, пропускаются
+    и передаются в on_error.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, create_missing=False,
+                 progress=None, on_error=None):
+        self.batch_size = batch_size
+        self.progress = progress or (lambda kind, stats: None)
+        self.on_error = on_error or (lambda kind, number, error: None)
+        self.users = LookupCache(
+            User.objects.all(), 'username',
+            create=self._create_users if create_missing else None,
+        )
+        self.groups = LookupCache(
+            Group.objects.all(), 'slug',
+            create=self._create_groups if create_missing else None,
+        )
+        # Что пересчитать в finish(): ленты авторов новых постов
+        # и подписок, индекс постов, записанных после started.
+        self.started = timezone.now()
+        self.authors = set()
+        self.resumed = False
+
+    # bulk_create не проверяет поля, поэтому недопустимые имена и slug
+    # не создаются, а записи с ними пропускаются как ссылки на
+    # неизвестных авторов и группы.
+    def _create_users(self, usernames):
+        User.objects.bulk_create(
+            [User(username=name, password=UNUSABLE_PASSWORD_PREFIX)
+             for name in usernames if _valid(User, 'username', name)],
+            ignore_conflicts=True,
+        )
+
+    def _create_groups(self, slugs):
+        Group.objects.bulk_create(
+            [Group(title=slug, slug=slug, description='')
+             for slug in slugs if _valid(Group, 'slug', slug)],
+            ignore_conflicts=True,
+        )
+
+    def _user(self, users, record, field):
+        username = _required(record, field)
+        if username not in users:
+            raise RecordError(f'нет пользователя {username}')
+        return users[username]
+
+    def build_posts(self, records):
+        """Функция, превращающая запись пачки в пост."""
+        users = self.users.resolve(
+            str(r.get('author', '')).strip() for r in records
+        )
+        groups = self.groups.resolve(
+            str(r['group']).strip() for r in records if r.get('group')
+        )
+        claims = IdClaims(Post, records, ImportedPost.objects.all())
+
+        def build(record):
+            group_id = None
+            if record.get('group'):
+                slug = str(record['group']).strip()
+                if slug not in groups:
+                    raise RecordError(f'нет группы {slug}')
+                group_id = groups[slug]
+            post = Post(
+                author_id=self._user(users, record, 'author'),
+                group_id=group_id,
+                text=_required(record, 'text'),
+                pub_date=_date(record, 'pub_date'),
+            )
+            post.id = claims.claim(record)
+            return post
+        return build
+
+    def build_comments(self, records):
+        users = self.users.resolve(
+            str(r.get('author', '')).strip() for r in records
+        )
+        wanted = {str(r['post']).strip() for r in records if r.get('post')}
+        post_ids = _existing(
+            ImportedPost.objects.all(),
+            [int(p) for p in wanted if p.isdigit()], 'post_id',
+        )
+        claims = IdClaims(Comment, records)
+
+        def build(record):
+            value = _required(record, 'post')
+            try:
+                post_id = int(value)
+            except (TypeError, ValueError):
+                raise RecordError(f'некорректный пост: {value!r}')
+            if post_id not in post_ids:
+                raise RecordError(f'нет импортированного поста {post_id}')
+            comment = Comment(
+                post_id=post_id,
+                author_id=self._user(users, record, 'author'),
+                text=_required(record, 'text'),
+                created=_date(record, 'created'),
+            )
+            comment.id = claims.claim(record)
+            return comment
+        return build
+
+    def build_follows(self, records):
+        users = self.users.resolve(
+            str(r.get(field, '')).strip()
+            for r in records for field in ('user', 'author')
+        )
+        pairs = set()
+        for chunk in batched(set(users.values()), LOOKUP_CHUNK):
+            pairs.update(
+                Follow.objects.filter(user_id__in=chunk)
+                .values_list('user_id', 'author_id')
+            )
+
+        def build(record):
+            user_id = self._user(users, record, 'user')
+            author_id = self._user(users, record, 'author')
+            if user_id == author_id:
+                raise RecordError('подписка на самого себя')
+            if (user_id, author_id) in pairs:
+                raise RecordError('подписка уже есть')
+            pairs.add((user_id, author_id))
+            return Follow(user_id=user_id, author_id=author_id)
+        return build
+
+    def _build(self, kind, numbered, stats):
+        """Объекты пачки; записи с ошибками пропускаются по одной."""
+        build = getattr(self, f'build_{kind}')(
+            [record for _, record in numbered if isinstance(record, dict)]
+        )
+        objects = []
+        for number, record in numbered:
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                if not isinstance(record, dict):
+                    raise RecordError('запись не является объектом')
+                objects.append(build(record))
+            except RecordError as error:
+                stats['skipped'] += 1
+                self.on_error(kind, number, error)
+        return objects
+
+    def import_file(self, kind, path, file_format=None, resume=True):
+        """Импортировать файл и вернуть статистику.
+
+        Контрольная точка хранится в ImportCheckpoint по абсолютному
+        пути файла; resume=False начинает импорт с начала файла
+        и перезаписывает её.
+        """
+        if kind not in KINDS:
+            raise ValueError(f'Неизвестный вид данных: {kind}')
+        file_format = file_format or detect_format(path)
+        checkpoint_path = os.path.abspath(path)
+        stats = {'read': 0, 'imported': 0, 'skipped': 0, 'offset': 0}
+        checkpoint = ImportCheckpoint.objects.filter(
+            path=checkpoint_path
+        ).values(*CHECKPOINT_FIELDS).first()
+        if resume and checkpoint:
+            stats.update(checkpoint)
+            self.resumed = True
+        started = time.perf_counter()
+        resumed_from = stats['read']
+        dates = {
+            'posts': (Post._meta.get_field('pub_date'),),
+            'comments': (Comment._meta.get_field('created'),),
+            'follows': (),
+        }[kind]
+        model = {'posts': Post, 'comments': Comment, 'follows': Follow}[kind]
+        with open(path, 'rb') as file, explicit_dates(*dates):
+            records = read_records(file, file_format, stats['offset'])
+            for batch in batched(records, self.batch_size):
+                numbered = [
+                    (stats['read'] + index + 1, record)
+                    for index, (_, record) in enumerate(batch)
+                ]
+                # Пачка и контрольная точка пишутся в одной транзакции:
+                # после сбоя пачка либо записана целиком вместе
+                # с точкой, либо будет прочитана заново, и строки без
+                # id не задваиваются. Занятые id и существующие подписки
+                # отсеяны в build, поэтому bulk_create вставляет все
+                # объекты, а гонка с другим процессом откатывает пачку
+                # ошибкой IntegrityError.
+                with transaction.atomic():
+                    objects = self._build(kind, numbered, stats)
+                    model.objects.bulk_create(objects)
+                    if kind == 'posts':
+                        ImportedPost.objects.bulk_create(
+                            ImportedPost(post_id=post.id)
+                            for post in objects if post.id is not None
+                        )
+                    stats['read'] += len(batch)
+                    stats['imported'] += len(objects)
+                    stats['offset'] = batch[-1][0]
+                    ImportCheckpoint.objects.update_or_create(
+                        path=checkpoint_path,
+                        defaults={
+                            key: stats[key] for key in CHECKPOINT_FIELDS
+                        },
+                    )
+                if kind != 'comments':
+                    self.authors.update(obj.author_id for obj in objects)
+                elapsed = time.perf_counter() - started
+                stats['rate'] = (stats['read'] - resumed_from) / elapsed
+                self.progress(kind, stats)
+        stats['seconds'] = time.perf_counter() - started
+        stats['rate'] = (
+            (stats['read'] - resumed_from) / stats['seconds']
+            if stats['seconds'] else 0
+        )
+        return stats
+
+    def finish(self):
+        """Пересчитать то, что при записи поддерживают сигналы.
+
+        bulk_create их не отправляет, поэтому счётчики сверяются
+        с данными, ленты пересобираются для авторов импортированных
+        постов и подписок, а записанные посты добавляются в поисковый
+        индекс. Если импорт продолжен с контрольной точки, часть записей
+        сделал прошлый запуск, и ленты с индексом пересобираются
+        целиком. Это делается в одной транзакции, чтобы читатели не
+        видели их пустыми. Последовательности ключей сдвигаются
+        за импортированные id.
+        """
+        sequences = connection.ops.sequence_reset_sql(
+            no_style(), [User, Group, Post, Comment, Follow]
+        )
+        with connection.cursor() as cursor:
+            for sql in sequences:
+                cursor.execute(sql)
+        counters.reconcile(self.batch_size)
+        backend = search.get_backend()
+        with transaction.atomic():
+            if self.resumed:
+                timeline.rebuild(self.batch_size)
+                backend.rebuild(self.batch_size)
+            else:
+                timeline.rebuild(self.batch_size, author_ids=self.authors)
+                backend.reindex(
+                    Post.objects.filter(updated__gte=self.started),
+                    self.batch_size,
+                )
+        bump_feed_version()
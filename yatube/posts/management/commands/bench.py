@@ -0,0 +1,70 @@
+import json
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу данными и замеряет основные '
+        'представления: p50/p95, число SQL-запросов и пик памяти (JSON).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=5,
+            help='Среднее количество подписок одного пользователя.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Количество замеров на каждое представление.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--output', help='Файл для отчёта; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            dataset = benchmarks.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows_per_user=options['follows_per_user'],
+                random_seed=options['seed'],
+            )
+            report = {
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': dataset,
+                'views': benchmarks.run(
+                    requests=options['requests'], cold=options['cold']
+                ),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
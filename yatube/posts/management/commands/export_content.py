@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+from posts.importer import KINDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии или подписки в JSONL или CSV, '
+        'читая базу порциями. Формат совпадает с import_content.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('output', help='Файл выгрузки.')
+        parser.add_argument(
+            '--format', choices=exporter.FORMATS, default='jsonl',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку gzip.',
+        )
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--group', help='Адрес (slug) группы.')
+        parser.add_argument(
+            '--since', help='Начало периода, ГГГГ-ММ-ДД включительно.',
+        )
+        parser.add_argument(
+            '--until', help='Конец периода, ГГГГ-ММ-ДД не включительно.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=exporter.CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            blocks = exporter.stream(
+                options['kind'],
+                options['format'],
+                compress=options['gzip'],
+                chunk_size=options['chunk_size'],
+                author=options['author'],
+                group=options['group'],
+                since=exporter.parse_bound(options['since']),
+                until=exporter.parse_bound(options['until']),
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        written = 0
+        with open(options['output'], 'wb') as file:
+            for block in blocks:
+                file.write(block)
+                written += len(block)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено в {options["output"]}: {written} байт.'
+        ))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.batching import BATCH_SIZE
+from posts.generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками. При одинаковом --seed данные '
+        'совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=10,
+            help='Среднее количество подписок одного пользователя.',
+        )
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько разных картинок раздать десятой части постов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='gen',
+            help='Префикс имён пользователей и адресов групп.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одной пачке.',
+        )
+
+    def progress(self, model, created):
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {created}'
+        )
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.progress,
+        )
+        try:
+            created = generator.generate(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows_per_user=options['follows_per_user'],
+                images=options['images'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: ' + ', '.join(
+                f'{name} {count}' for name, count in created.items()
+            ) + '.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для постов, у которых их ещё нет.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            Q(thumbnail_url='') | Q(thumbnail_srcset='')
+        )
+        generated = 0
+        for post in posts.only('id', 'image').iterator():
+            post.store_thumbnail()
+            generated += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано миниатюр: {generated}.'
+        ))
@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.batching import BATCH_SIZE
+from posts.importer import KINDS, ContentImporter
+
+PROGRESS_INTERVAL = 5.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из файлов JSONL или '
+        'CSV пачками bulk_create. Прерванный импорт продолжается '
+        'с контрольной точки, сохранённой в базе. Записи с уже занятым '
+        'id и существующие подписки пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', metavar='PATH',
+            help='Посты: id, author, group, text, pub_date.',
+        )
+        parser.add_argument(
+            '--comments', metavar='PATH',
+            help='Комментарии: id, post, author, text, created.',
+        )
+        parser.add_argument(
+            '--follows', metavar='PATH',
+            help='Подписки: user, author.',
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файлов; по умолчанию по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество записей в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных пользователей и группы.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Не продолжать с контрольной точки, читать файлы заново.',
+        )
+
+    def progress(self, kind, stats):
+        now = time.monotonic()
+        if now - self.reported < PROGRESS_INTERVAL:
+            return
+        self.reported = now
+        self.stdout.write(
+            f'{kind}: прочитано {stats["read"]}, записано '
+            f'{stats["imported"]}, пропущено {stats["skipped"]} '
+            f'({stats["rate"]:.0f} записей/с)'
+        )
+
+    def error(self, kind, number, error):
+        self.stderr.write(f'{kind}, запись {number}: {error}')
+
+    def handle(self, *args, **options):
+        files = [
+            (kind, options[kind]) for kind in KINDS if options[kind]
+        ]
+        if not files:
+            raise CommandError('Укажите хотя бы один из --posts, '
+                               '--comments, --follows.')
+        self.reported = time.monotonic()
+        importer = ContentImporter(
+            batch_size=options['batch_size'],
+            create_missing=options['create_missing'],
+            progress=self.progress,
+            on_error=self.error,
+        )
+        for kind, path in files:
+            stats = importer.import_file(
+                kind, path, options['format'],
+                resume=not options['restart'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: записано {stats["imported"]}, пропущено '
+                f'{stats["skipped"]} за {stats["seconds"]:.1f} с '
+                f'({stats["rate"]:.0f} записей/с).'
+            ))
+        importer.finish()
+        self.stdout.write(self.style.SUCCESS(
+            'Счётчики, ленты подписок и поисковый индекс пересчитаны.'
+        ))
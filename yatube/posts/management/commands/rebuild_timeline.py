@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=timeline.BATCH_SIZE,
+            help='Количество подписок, читаемых из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            timeline.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента пересобрана: {Timeline.objects.count()} записей.'
+        ))
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .thumbnails import thumbnail_fields
+
 User = get_user_model()
 
 
@@ -38,6 +40,11 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name="Дата публикации"
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения",
+        help_text="Меняется при правке поста и его комментариев"
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -59,15 +66,72 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail_url = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name="Адрес миниатюры"
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name="Ширина миниатюры"
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name="Высота миниатюры"
+    )
+    thumbnail_srcset = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name="Варианты миниатюры"
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество комментариев"
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                name='post_feed_idx',
+                fields=['-pub_date', '-id'],
+            ),
+            models.Index(
+                name='post_author_feed_idx',
+                fields=['author', '-pub_date', '-id'],
+            ),
+            models.Index(
+                name='post_group_feed_idx',
+                fields=['group', '-pub_date', '-id'],
+            ),
+        ]
         verbose_name = "Статья"
         verbose_name_plural = "Статьи"
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        image_changed = (
+            not self.image._committed
+            or bool(self.image) != bool(self.thumbnail_url)
+            or bool(self.image) != bool(self.thumbnail_srcset)
+        )
+        super().save(*args, **kwargs)
+        if image_changed:
+            self.store_thumbnail()
+
+    def store_thumbnail(self):
+        """Сгенерировать миниатюру заранее, чтобы шаблоны не делали это."""
+        fields = thumbnail_fields(self.image)
+        for name, value in fields.items():
+            setattr(self, name, value)
+        Post.objects.filter(pk=self.pk).update(**fields)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -94,6 +158,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                name='comment_post_feed_idx',
+                fields=['post', '-created', '-id'],
+            ),
+        ]
         verbose_name = "Коментарий"
         verbose_name_plural = "Коментари к постам"
 
@@ -126,5 +196,138 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F("author")),
             ),
         ]
+        indexes = [
+            models.Index(
+                name='follow_author_user_idx',
+                fields=['author', 'user'],
+            ),
+        ]
         verbose_name = "Подписчик"
         verbose_name_plural = "Подписчики"
+
+
+class Timeline(models.Model):
+    """Лента подписок пользователя, заполняемая при публикации поста."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name="Читатель",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Пост",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Автор",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='exclude a repeated post in the timeline',
+                fields=['user', 'post'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='timeline_user_feed_idx',
+                fields=['user', '-pub_date', '-post'],
+            ),
+            models.Index(
+                name='timeline_user_author_idx',
+                fields=['user', 'author'],
+            ),
+        ]
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Ленты подписок"
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, поддерживаемые при записи."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='counters',
+        verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество постов",
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество подписчиков",
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество подписок",
+    )
+
+    class Meta:
+        verbose_name = "Счётчики пользователя"
+        verbose_name_plural = "Счётчики пользователей"
+
+    def __str__(self):
+        return str(self.user)
+
+
+class ImportedPost(models.Model):
+    """Пост, записанный import_content со своим id из источника.
+
+    Комментарии при импорте привязываются только к таким постам,
+    а не к уже существовавшему посту с тем же id.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name="Пост",
+    )
+
+    class Meta:
+        verbose_name = "Импортированный пост"
+        verbose_name_plural = "Импортированные посты"
+
+
+class ImportCheckpoint(models.Model):
+    """Место, до которого импортирован файл.
+
+    Обновляется в транзакции пачки, поэтому после сбоя импорт
+    продолжается ровно с первой незаписанной пачки.
+    """
+    path = models.CharField(
+        max_length=1024,
+        unique=True,
+        verbose_name="Файл",
+    )
+    offset = models.BigIntegerField(
+        default=0,
+        verbose_name="Смещение в файле",
+    )
+    read = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Прочитано записей",
+    )
+    imported = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Записано",
+    )
+    skipped = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Пропущено",
+    )
+
+    class Meta:
+        verbose_name = "Контрольная точка импорта"
+        verbose_name_plural = "Контрольные точки импорта"
+
+    def __str__(self):
+        return self.path
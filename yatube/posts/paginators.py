@@ -0,0 +1,164 @@
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_SEPARATOR = '|'
+ADMIN_COUNT_LIMIT = 10000
+
+TABLE_ESTIMATE_SQL = {
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+    'mysql': (
+        'SELECT table_rows FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
+
+
+def estimate_table_rows(model):
+    """Число строк таблицы по статистике СУБД или None, если её нет.
+
+    Для SQLite статистика появляется после ANALYZE.
+    """
+    sql = TABLE_ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    return max(int(str(row[0]).split()[0]), 0)
+
+
+class AdminPaginator(Paginator):
+    """Paginator админки без COUNT(*) по всей таблице.
+
+    Без фильтров количество берётся из статистики таблицы, с фильтрами
+    считается не больше ADMIN_COUNT_LIMIT строк: дальние страницы
+    большой выборки всё равно удобнее сузить фильтром.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimated = estimate_table_rows(self.object_list.model)
+            if estimated is not None:
+                return estimated
+        return self.object_list[:ADMIN_COUNT_LIMIT].count()
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Страницы адресуются непрозрачными курсорами ?after= и ?before=,
+    поэтому глубокая страница стоит столько же, сколько первая.
+    Номер страницы не вычисляется: number равен 1 только у первой
+    страницы, а num_pages показывает лишь наличие следующей.
+    Количество строк (count) не поддерживается.
+    """
+
+    def __init__(self, object_list, per_page, key=('pub_date', 'id'),
+                 after=None, before=None, **kwargs):
+        super().__init__(
+            object_list.order_by(*(f'-{name}' for name in key)), per_page,
+            **kwargs
+        )
+        self.key = key
+        self.after = self.decode_cursor(after)
+        self.before = None if self.after else self.decode_cursor(before)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._num_pages = 1
+
+    def __getstate__(self):
+        # При сериализации QuerySet выполнился бы целиком, а для
+        # кешированной страницы он уже не нужен.
+        state = self.__dict__.copy()
+        state['object_list'] = None
+        return state
+
+    @property
+    def count(self):
+        # Иначе Paginator выполнил бы COUNT(*) по всей ленте, а у
+        # закешированной страницы и запроса для него уже нет.
+        raise NotImplementedError('CursorPaginator не считает строки')
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def encode_cursor(self, obj):
+        # Строки .values() — словари, в них ключ читается по имени.
+        if isinstance(obj, dict):
+            values = (obj[name] for name in self.key)
+        else:
+            values = (getattr(obj, name) for name in self.key)
+        raw = CURSOR_SEPARATOR.join(
+            value.isoformat() if hasattr(value, 'isoformat') else str(value)
+            for value in values
+        )
+        return urlsafe_base64_encode(force_bytes(raw))
+
+    def decode_cursor(self, token):
+        """Разобрать курсор; испорченный курсор ведёт на первую страницу."""
+        if not token:
+            return None
+        try:
+            parts = force_str(urlsafe_base64_decode(token)).split(
+                CURSOR_SEPARATOR
+            )
+            if len(parts) != len(self.key):
+                return None
+            opts = self.object_list.model._meta
+            return tuple(
+                opts.get_field(name).to_python(part)
+                for name, part in zip(self.key, parts)
+            )
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def _seek(self, values, lookup):
+        condition = Q()
+        for position, (name, value) in enumerate(zip(self.key, values)):
+            step = Q(**{f'{name}__{lookup}': value})
+            for prefix, prefix_value in zip(self.key[:position], values):
+                step &= Q(**{prefix: prefix_value})
+            condition |= step
+        return condition
+
+    def page_queryset(self):
+        """Запрос строк страницы и одной строки сверх неё."""
+        queryset = self.object_list
+        if self.before:
+            queryset = queryset.reverse().filter(self._seek(self.before, 'gt'))
+        elif self.after:
+            queryset = queryset.filter(self._seek(self.after, 'lt'))
+        return queryset[:self.per_page + 1]
+
+    def get_page(self, number=None):
+        """Вернуть страницу, на которую указывает курсор."""
+        rows = list(self.page_queryset())
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.before:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = self.after is not None, has_more
+        if not rows:
+            has_previous = has_next = False
+        if has_previous:
+            self.previous_cursor = self.encode_cursor(rows[0])
+        if has_next:
+            self.next_cursor = self.encode_cursor(rows[-1])
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        return Page(rows, number, self)
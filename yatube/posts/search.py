@@ -0,0 +1,191 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils.module_loading import import_string
+
+from .batching import BATCH_SIZE, batched
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+MAX_TERMS = 8
+MIN_STEM = 3
+REINDEX_CHUNK = 500
+# Окончания русских слов, от длинных к коротким. Запрос ищет слова
+# по основе как по префиксу, поэтому «котики» находит «котик» и «котиков».
+RUSSIAN_ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ешь', 'ете', 'ишь', 'ите', 'ует', 'уют', 'ают', 'яют', 'ать',
+    'ять', 'ить', 'еть', 'ция', 'ции', 'ий', 'ый', 'ой', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов',
+    'ев', 'ей', 'ию', 'ия', 'ью', 'ут', 'ют', 'ет', 'ит', 'ть', 'а',
+    'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+
+def stem(word):
+    """Основа слова без окончания; короткие слова не укорачиваются."""
+    word = word.lower().replace('ё', 'е')
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def terms(query):
+    return [stem(word) for word in WORD.findall(query)][:MAX_TERMS]
+
+
+class SearchBackend:
+    """Полнотекстовый поиск по постам.
+
+    search() возвращает ключи постов от самых подходящих. index()
+    и remove() вызываются сигналами Post, rebuild() — командой
+    rebuild_search_index, reindex() — после импорта.
+    """
+
+    def index(self, post):
+        pass
+
+    def reindex(self, posts, batch_size=BATCH_SIZE):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self, batch_size=BATCH_SIZE):
+        pass
+
+    def search(self, query, limit):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Поиск без индекса: LIKE по каждому слову, свежие посты первыми."""
+
+    def search(self, query, limit):
+        words = terms(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        return list(
+            Post.objects.filter(condition)
+            .order_by('-pub_date', '-id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Индекс FTS5 posts_post_fts, упорядочение по bm25.
+
+    Токенизатор unicode61 приводит кириллицу к нижнему регистру
+    и ё к е; окончания отбрасываются на стороне запроса.
+    """
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text],
+            )
+
+    def reindex(self, posts, batch_size=BATCH_SIZE):
+        """Переиндексировать посты из QuerySet posts пачками."""
+        ids = posts.order_by().values_list('id', flat=True)
+        # Не больше параметров в одном IN, чем позволяет SQLite.
+        chunks = batched(ids.iterator(), min(batch_size, REINDEX_CHUNK))
+        with connection.cursor() as cursor:
+            for chunk in chunks:
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} '
+                    f'WHERE rowid IN ({placeholders})', chunk,
+                )
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                    f'SELECT id, text FROM {Post._meta.db_table} '
+                    f'WHERE id IN ({placeholders})', chunk,
+                )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self, batch_size=BATCH_SIZE):
+        last_id = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            for start in range(0, last_id, batch_size):
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                    f'SELECT id, text FROM {Post._meta.db_table} '
+                    'WHERE id > %s AND id <= %s',
+                    [start, start + batch_size],
+                )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+            )
+
+    def search(self, query, limit):
+        words = terms(query)
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        # bm25 считается только для SEARCH_CANDIDATES самых новых
+        # совпадений: у частых слов их миллионы, а время поиска должно
+        # оставаться постоянным.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM (SELECT rowid, rank FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s) '
+                'ORDER BY rank LIMIT %s',
+                [match, settings.SEARCH_CANDIDATES, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """to_tsvector('russian') со стеммером Snowball и индексом GIN.
+
+    Индекс по выражению поддерживается базой, поэтому index()
+    и remove() ничего не делают.
+    """
+
+    def search(self, query, limit):
+        from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                                    SearchVector)
+        words = WORD.findall(query)[:MAX_TERMS]
+        if not words:
+            return []
+        vector = SearchVector('text', config='russian')
+        search_query = SearchQuery(' '.join(words), config='russian')
+        return list(
+            Post.objects.annotate(document=vector)
+            .filter(document=search_query)
+            .annotate(rank=SearchRank(vector, search_query))
+            .order_by('-rank', '-pub_date')
+            .values_list('id', flat=True)[:limit]
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Бэкенд из SEARCH_BACKEND или по типу базы данных."""
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)()
@@ -0,0 +1,12 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, sizes=None):
+    return {
+        'post': post,
+        'sizes': sizes or settings.POST_THUMBNAIL_SIZES,
+    }
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        authors = [
+            User.objects.create_user(username=f'author_{num}')
+            for num in range(3)
+        ]
+        for num in range(6):
+            post = Post.objects.create(
+                author=authors[num % 3], group=cls.group,
+                text=f'Тестовый пост {num}',
+            )
+            Comment.objects.create(
+                post=post, author=authors[(num + 1) % 3], text='Комментарий'
+            )
+        Follow.objects.create(user=authors[0], author=authors[1])
+        Follow.objects.create(user=authors[1], author=authors[2])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelists_skip_full_count_and_joins(self):
+        """Список не считает таблицу целиком и не делает запрос на строку."""
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), 6)
+                for query in queries:
+                    if 'COUNT(' in query['sql']:
+                        self.assertIn('LIMIT', query['sql'])
+
+    def test_post_changelist_has_no_group_selects(self):
+        """Группа в списке не редактируется и не тянет список групп."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, self.group.title, count=6)
+        self.assertNotContains(response, 'name="form-0-group"')
+        self.assertFalse([
+            query for query in queries
+            if query['sql'].startswith('SELECT "posts_group"')
+        ])
+
+    def test_comment_search_by_exact_username(self):
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'author_1'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            set(Comment.objects.filter(author__username='author_1')),
+        )
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'Комментарий'}
+        )
+        self.assertFalse(response.context['cl'].result_list)
+
+    def test_follow_search_by_username(self):
+        response = self.client.get(
+            reverse('admin:posts_follow_changelist'), {'q': 'author_2'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            list(Follow.objects.filter(author__username='author_2')),
+        )
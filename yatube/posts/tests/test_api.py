@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group if num % 2 else None,
+                text=f'Тестовый пост {num}',
+            )
+            for num in range(15)
+        ]
+        Post.objects.filter(pk=cls.posts[-1].pk).update(
+            thumbnail_url='/media/cache/thumb.jpg',
+            thumbnail_width=960, thumbnail_height=339,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_default_fields_skip_text(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:api_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        first = response.json()['results'][0]
+        self.assertEqual(first, {
+            'id': self.posts[-1].pk,
+            'pub_date': first['pub_date'],
+            'author': 'author',
+            'group': None,
+            'comments_count': 0,
+            'image': {
+                'url': '/media/cache/thumb.jpg', 'width': 960, 'height': 339,
+            },
+        })
+        self.assertNotIn('"text"', queries[-1]['sql'])
+
+    def test_sparse_fields(self):
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'id,text'}
+        )
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.posts[-1].pk, 'text': self.posts[-1].text},
+        )
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_cursor_pagination_walks_feed(self):
+        url = reverse('posts:api_index') + '?fields=id&limit=4'
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+            pages += 1
+        self.assertEqual(pages, 4)
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        previous = self.client.get(data['previous']).json()
+        self.assertEqual(
+            [item['id'] for item in previous['results']],
+            [post.pk for post in reversed(self.posts[3:7])],
+        )
+
+    def test_group_and_profile_feeds(self):
+        response = self.client.get(
+            reverse('posts:api_group_list', args=['test-slug']),
+            {'limit': 100},
+        )
+        self.assertEqual(len(response.json()['results']), 7)
+        response = self.client.get(
+            reverse('posts:api_profile', args=['reader'])
+        )
+        self.assertEqual(response.json()['results'], [])
+        for url in (reverse('posts:api_group_list', args=['missing']),
+                    reverse('posts:api_profile', args=['missing'])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_follow_feed(self):
+        url = reverse('posts:api_follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        results = self.client.get(url, {'fields': 'id,author'}).json()
+        self.assertEqual(
+            results['results'][0],
+            {'id': self.posts[-1].pk, 'author': 'author'},
+        )
+        self.assertEqual(len(results['results']), 10)
+        self.assertIsNotNone(results['next'])
@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from .. import benchmarks
+from ..generator import DataGenerator
+from ..models import Comment, Follow, Post, Timeline, User, UserCounters
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_creates_dataset(self):
+        """seed пишет больше строк, чем помещается в один INSERT SQLite."""
+        dataset = benchmarks.seed(
+            users=40, groups=2, posts=600, comments=10, follows_per_user=5
+        )
+        self.assertEqual(dataset['posts'], 600)
+        self.assertEqual(Post.objects.count(), 600)
+        self.assertEqual(Follow.objects.count(), dataset['follows'])
+        self.assertTrue(Timeline.objects.exists())
+
+    def test_run_reports_every_view(self):
+        benchmarks.seed(users=5, groups=2, posts=30, comments=10)
+        report = benchmarks.run(requests=2)
+        self.assertEqual(
+            set(report),
+            {'index', 'group_posts', 'profile', 'post_detail',
+             'follow_index', 'post_create', 'add_comment', 'api_index',
+             'api_group_posts', 'api_profile', 'api_follow_index'},
+        )
+        for name, result in report.items():
+            with self.subTest(view=name):
+                self.assertIn(result['status'], (200, 302))
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertIsInstance(result['queries'], int)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DataGeneratorTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def generate(self, prefix, seed=0, **kwargs):
+        options = {
+            'users': 50, 'groups': 3, 'posts': 200, 'comments': 100,
+            'follows_per_user': 4,
+        }
+        options.update(kwargs)
+        return DataGenerator(prefix=prefix, seed=seed).generate(**options)
+
+    def snapshot(self, prefix):
+        posts = Post.objects.filter(
+            author__username__startswith=prefix
+        ).order_by('pk')
+        return [
+            (post.author.last_name, post.text, post.pub_date)
+            for post in posts.select_related('author')
+        ]
+
+    def test_same_seed_same_data(self):
+        self.generate('first')
+        self.generate('second')
+        self.generate('third', seed=1)
+        self.assertEqual(self.snapshot('first'), self.snapshot('second'))
+        self.assertNotEqual(self.snapshot('first'), self.snapshot('third'))
+
+    def test_used_prefix_is_rejected(self):
+        created = self.generate('other')
+        self.assertEqual(created['users'], 50)
+        with self.assertRaises(CommandError):
+            call_command('generate_data', prefix='other', users=1,
+                         stdout=StringIO())
+        self.assertEqual(
+            User.objects.filter(username__startswith='other_').count(), 50
+        )
+
+    def test_derived_tables_are_rebuilt(self):
+        created = self.generate('gen')
+        self.assertEqual(Comment.objects.count(), created['comments'])
+        self.assertEqual(
+            sum(UserCounters.objects.values_list('posts_count', flat=True)),
+            created['posts'],
+        )
+        self.assertEqual(
+            sum(Post.objects.values_list('comments_count', flat=True)),
+            created['comments'],
+        )
+        self.assertTrue(Timeline.objects.exists())
+
+    def test_follow_graph_is_skewed(self):
+        created = self.generate('gen', users=200, follows_per_user=5)
+        followers = list(
+            Follow.objects.values('author').annotate(
+                total=Count('user')
+            ).order_by('-total').values_list('total', flat=True)
+        )
+        self.assertEqual(sum(followers), created['follows'])
+        self.assertGreater(followers[0], 10 * followers[len(followers) // 2])
+
+    def test_images_are_shared_with_thumbnails(self):
+        self.generate('gen', images=2)
+        posts = Post.objects.exclude(image='')
+        self.assertTrue(posts.exists())
+        self.assertLessEqual(
+            posts.values('image').distinct().count(), 2
+        )
+        self.assertFalse(posts.filter(thumbnail_url='').exists())
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cards import CARD_TEMPLATE, card_key
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        for num in range(3):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Тестовый пост {num}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cards_are_shared_between_feeds(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, CARD_TEMPLATE)
+        for url in (reverse('posts:group_list', args=['test-slug']),
+                    reverse('posts:profile', args=['author'])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTemplateNotUsed(response, CARD_TEMPLATE)
+                self.assertContains(response, 'Тестовый пост 2')
+                self.assertContains(response, 'Имя Фамилия')
+
+    def test_key_follows_post_author_and_group(self):
+        post = Post.objects.select_related('author', 'group').first()
+        key = card_key(post)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertNotEqual(card_key(post), key)
+        key = card_key(post)
+        post.author.first_name = 'Другое'
+        self.assertNotEqual(card_key(post), key)
+        key = card_key(post)
+        post.group.slug = 'new-slug'
+        self.assertNotEqual(card_key(post), key)
+
+    def test_key_follows_thumbnail_but_not_comments(self):
+        post = Post.objects.select_related('author', 'group').first()
+        key = card_key(post)
+        Comment.objects.create(post=post, author=self.author, text='Тест')
+        post = Post.objects.select_related('author', 'group').get(pk=post.pk)
+        self.assertEqual(card_key(post), key)
+        Post.objects.filter(pk=post.pk).update(
+            thumbnail_url='/media/cache/thumb.jpg',
+            thumbnail_srcset='/media/cache/thumb.jpg 480w',
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(card_key(post), key)
+
+    def test_feeds_show_edits(self):
+        url = reverse('posts:profile', args=['author'])
+        self.client.get(url)
+        post = Post.objects.first()
+        post.text = 'Исправленный пост'
+        post.save()
+        User.objects.filter(pk=self.author.pk).update(last_name='Новая')
+        response = self.client.get(url)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertContains(response, 'Имя Новая')
@@ -0,0 +1,124 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..caching import FEED_VERSION_KEY
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code
+
+    def test_unchanged_pages_return_304_without_rendering(self):
+        urls = (
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                with CaptureQueriesContext(connection) as queries:
+                    repeated = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.content, b'')
+                self.assertEqual(len(queries), 1)
+
+    def test_if_modified_since_is_not_trusted(self):
+        """Дата не учитывает посетителя, поэтому 304 только по ETag."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        repeated = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600)
+        )
+        self.assertEqual(repeated.status_code, 200)
+
+    def test_post_detail_changes_with_post_and_comments(self):
+        post = Post.objects.get(pk=self.post.pk)
+        url = reverse('posts:post_detail', args=[post.pk])
+        response = self.client.get(url)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(self.revalidate(url, response), 200)
+        response = self.client.get(url)
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_feeds_change_with_new_posts_and_follows(self):
+        group_url = reverse('posts:group_list', args=[self.group.slug])
+        group_response = self.client.get(group_url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        self.assertEqual(self.revalidate(group_url, group_response), 200)
+        self.client.force_login(self.reader)
+        profile_url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(profile_url)
+        self.assertEqual(self.revalidate(profile_url, response), 304)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revalidate(profile_url, response), 200)
+
+    def test_feeds_change_after_write_in_other_process(self):
+        """ETag лент читается из базы, а не из кеша этого процесса."""
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        responses = [self.client.get(url) for url in urls]
+        version = cache.get(FEED_VERSION_KEY)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        # Другой процесс записал пост, а локальный кеш о нём не знает.
+        cache.set(FEED_VERSION_KEY, version, None)
+        for url, response in zip(urls, responses):
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_group_feed_changes_with_author_name(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        response = self.client.get(url)
+        User.objects.filter(pk=self.author.pk).update(first_name='Имя')
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_etag_depends_on_viewer(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        anonymous = self.client.get(url)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.revalidate(url, anonymous), 200)
+
+    def test_missing_objects_still_404(self):
+        for url in (reverse('posts:post_detail', args=[10 ** 6]),
+                    reverse('posts:group_list', args=['missing']),
+                    reverse('posts:profile', args=['missing'])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,155 @@
+import csv
+import datetime as dt
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import exporter
+from ..models import Comment, Follow, Group, Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ExportContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group if num % 2 else None,
+                text=f'Пост {num}, "с кавычками"\nи переносом',
+            )
+            for num in range(4)
+        ]
+        Post.objects.filter(pk=cls.posts[0].pk).update(
+            pub_date=dt.datetime(2020, 1, 1, tzinfo=timezone.utc)
+        )
+        Comment.objects.create(
+            post=cls.posts[1], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def export(self, kind, file_format='jsonl', **options):
+        return b''.join(exporter.stream(kind, file_format, **options))
+
+    def test_jsonl_matches_import_format(self):
+        records = [
+            json.loads(line)
+            for line in self.export('posts').decode().splitlines()
+        ]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in self.posts],
+        )
+        self.assertEqual(records[1]['author'], 'author')
+        self.assertEqual(records[1]['group'], 'test-slug')
+        self.assertIsNone(records[0]['group'])
+        self.assertEqual(records[0]['pub_date'], '2020-01-01T00:00:00+00:00')
+        self.assertEqual(records[2]['text'], self.posts[2].text)
+
+    def test_csv_quotes_text(self):
+        data = self.export('comments', 'csv', chunk_size=1).decode()
+        self.assertEqual(
+            list(csv.DictReader(io.StringIO(data))),
+            [{
+                'id': str(Comment.objects.get().pk),
+                'post': str(self.posts[1].pk),
+                'author': 'reader',
+                'text': 'Комментарий',
+                'created': Comment.objects.get().created.isoformat(),
+            }],
+        )
+        rows = list(csv.DictReader(io.StringIO(
+            self.export('posts', 'csv').decode()
+        )))
+        self.assertEqual(rows[3]['text'], self.posts[3].text)
+        self.assertEqual(rows[0]['group'], '')
+
+    def test_gzip(self):
+        self.assertEqual(
+            gzip.decompress(self.export('follows', compress=True)),
+            self.export('follows'),
+        )
+
+    def test_filters(self):
+        def ids(**filters):
+            return [
+                json.loads(line)['id'] for line in
+                self.export('posts', **filters).decode().splitlines()
+            ]
+
+        self.assertEqual(
+            ids(group='test-slug'), [self.posts[1].pk, self.posts[3].pk]
+        )
+        self.assertEqual(ids(author='reader'), [])
+        self.assertEqual(
+            ids(until=exporter.parse_bound('2021-01-01')), [self.posts[0].pk]
+        )
+        self.assertEqual(
+            ids(since=exporter.parse_bound('2021-01-01')),
+            [post.pk for post in self.posts[1:]],
+        )
+        with self.assertRaises(ValueError):
+            exporter.stream('follows', group='test-slug')
+        with self.assertRaises(ValueError):
+            exporter.parse_bound('вчера')
+
+    def test_blocks_are_buffered(self):
+        blocks = list(exporter.chunks(['абв\n'] * 100, size=70))
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(b''.join(blocks), 'абв\n'.encode() * 100)
+
+    def test_command_writes_file(self):
+        path = os.path.join(TEMP_DIR, 'posts.csv.gz')
+        call_command(
+            'export_content', 'posts', path, format='csv', gzip=True,
+            group='test-slug', stdout=StringIO(),
+        )
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 2)
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('posts:export_content', args=['posts'])
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(url, {'format': 'csv', 'gzip': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="posts.csv.gz"',
+        )
+        data = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(data.decode().splitlines()), 9)
+        for params in ({'format': 'xml'}, {'since': 'вчера'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get(url, params).status_code, 400)
+        self.assertEqual(
+            client.get(reverse('posts:export_content', args=['users']))
+            .status_code,
+            400,
+        )
@@ -1,8 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Group, Post, Follow
+from ..models import Group, Post, Follow, Timeline
 
 User = get_user_model()
 
@@ -91,3 +94,45 @@ class FollowTests(TestCase):
             reverse('posts:follow_index')
         )
         self.assertNotIn(self.post, response.context['page_obj'])
+
+    def test_new_post_fan_out_to_timeline(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        Follow.objects.create(
+            user=self.user_follower,
+            author=self.user_post_author,
+        )
+        new_post = Post.objects.create(
+            text='Пост после подписки',
+            author=self.user_post_author,
+        )
+        self.assertTrue(Timeline.objects.filter(
+            user=self.user_follower, post=new_post
+        ).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.post]
+        )
+
+    def test_unfollow_clears_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', args=[self.user_post_author.username]
+        ))
+        self.assertTrue(self.user_follower.timeline.exists())
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', args=[self.user_post_author.username]
+        ))
+        self.assertFalse(self.user_follower.timeline.exists())
+
+    def test_rebuild_timeline_command(self):
+        """Команда rebuild_timeline восстанавливает ленты по подпискам."""
+        Follow.objects.create(
+            user=self.user_follower,
+            author=self.user_post_author,
+        )
+        Timeline.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(
+            list(self.user_follower.timeline.values_list('post', flat=True)),
+            [self.post.id]
+        )
@@ -1,11 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Group, Post, Comment
 
@@ -95,7 +97,30 @@ class PostPagesTests(TestCase):
         self.assertEqual(Post.objects.count(), posts_count + 1)
         self.assertEqual(new_post.text, form_data['text'])
         self.assertEqual(new_post.group.id, form_data['group'])
-        self.assertEqual(new_post.image.name, f"posts/{form_data['image']}")
+        self.assertTrue(new_post.image.name.startswith('posts/small.'))
+
+    @override_settings(POST_IMAGE_MAX_SIZE=(100, 100))
+    def test_post_create_normalizes_image(self):
+        """Загруженная картинка уменьшается и теряет метаданные."""
+        exif = Image.Exif()
+        exif[0x010E] = 'Описание с телефона'
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        uploaded = SimpleUploadedFile(
+            name='photo.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с большой картинкой', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Пост с большой картинкой')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertFalse(image.getexif())
 
     def test_post_edit_unauthorized_user(self):
         """Проверка редактирования записи не авторизированным клиентом."""
@@ -0,0 +1,233 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..importer import ContentImporter
+from ..models import (Comment, Follow, Group, Post, Timeline, User,
+                      UserCounters)
+from ..search import get_backend
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, f'{self.id()}-{name}')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def jsonl(self, name, records):
+        return self.write(name, ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ))
+
+    def test_imports_posts_comments_and_follows(self):
+        posts = self.jsonl('posts.jsonl', [
+            {'id': 1000 + num, 'author': 'author', 'group': 'test-slug',
+             'text': f'Импортированный пост {num}',
+             'pub_date': f'2021-01-{num + 1:02d}T10:00:00'}
+            for num in range(5)
+        ])
+        comments = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            '1000,reader,"Первая строка\nвторая строка",2021-02-01 12:00\n'
+            '1001,reader,Комментарий,\n',
+        )
+        follows = self.jsonl('follows.jsonl', [
+            {'user': 'reader', 'author': 'author'},
+        ])
+        call_command(
+            'import_content', posts=posts, comments=comments,
+            follows=follows, batch_size=2, stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.filter(pk__gte=1000).count(), 5)
+        post = Post.objects.get(pk=1000)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2021)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            Comment.objects.get(post_id=1000).text,
+            'Первая строка\nвторая строка',
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 5)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 5
+        )
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertGreater(new_post.pk, 1004)
+
+    def test_invalid_records_are_skipped(self):
+        path = self.jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Хороший пост'},
+            {'author': 'nobody', 'text': 'Неизвестный автор'},
+            {'author': 'author', 'group': 'missing', 'text': 'Нет группы'},
+            {'author': 'author', 'text': '  '},
+            {'author': 'author', 'text': 'Дата', 'pub_date': 'вчера'},
+        ])
+        errors = []
+        importer = ContentImporter(
+            on_error=lambda kind, number, error: errors.append(number)
+        )
+        stats = importer.import_file('posts', path)
+        self.assertEqual(stats['imported'], 1)
+        self.assertEqual(stats['skipped'], 4)
+        self.assertEqual(errors, [2, 3, 4, 5])
+        self.assertTrue(Post.objects.filter(text='Хороший пост').exists())
+
+    def test_create_missing_users_and_groups(self):
+        path = self.jsonl('posts.jsonl', [
+            {'author': 'newcomer', 'group': 'new-group', 'text': 'Пост'},
+        ])
+        ContentImporter(create_missing=True).import_file('posts', path)
+        post = Post.objects.get(text='Пост')
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, 'new-group')
+
+    def test_create_missing_skips_invalid_names(self):
+        path = self.jsonl('posts.jsonl', [
+            {'text': 'Без автора'},
+            {'author': 'bad name!', 'text': 'Пробел в имени'},
+            {'author': 'x' * 151, 'text': 'Длинное имя'},
+            {'author': 'author', 'group': 'плохой slug', 'text': 'Группа'},
+        ])
+        users = User.objects.count()
+        stats = ContentImporter(create_missing=True).import_file(
+            'posts', path
+        )
+        self.assertEqual(stats['skipped'], 4)
+        self.assertEqual(User.objects.count(), users)
+        self.assertFalse(Group.objects.exclude(pk=self.group.pk).exists())
+
+    def test_resumes_from_checkpoint(self):
+        path = self.jsonl('posts.jsonl', [
+            {'id': 2000 + num, 'author': 'author', 'text': f'Пост {num}'}
+            for num in range(5)
+        ] + [{'author': 'author', 'text': 'Пост без id'}])
+        with_ids = Post.objects.filter(pk__in=range(2000, 2005))
+
+        class Interrupted(Exception):
+            pass
+
+        def interrupt(kind, stats):
+            if stats['read'] >= 2:
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            ContentImporter(batch_size=2, progress=interrupt).import_file(
+                'posts', path
+            )
+        self.assertEqual(with_ids.count(), 2)
+        stats = ContentImporter(batch_size=2).import_file('posts', path)
+        self.assertEqual(stats['read'], 6)
+        self.assertEqual(stats['imported'], 6)
+        self.assertEqual(with_ids.count(), 5)
+        self.assertEqual(Post.objects.filter(text='Пост без id').count(), 1)
+        # Повтор с начала не перезаписывает посты с теми же id.
+        stats = ContentImporter(batch_size=2).import_file(
+            'posts', path, resume=False
+        )
+        self.assertEqual(stats['imported'], 1)
+        self.assertEqual(stats['skipped'], 5)
+        self.assertEqual(with_ids.count(), 5)
+
+    def test_taken_id_is_not_overwritten(self):
+        existing = Post.objects.create(author=self.reader, text='Старый пост')
+        posts = self.jsonl('posts.jsonl', [
+            {'id': existing.pk, 'author': 'author', 'text': 'Чужой id'},
+            {'id': 3000, 'author': 'author', 'text': 'Новый id'},
+            {'id': 3000, 'author': 'author', 'text': 'Повтор id'},
+        ])
+        comments = self.jsonl('comments.jsonl', [
+            {'post': existing.pk, 'author': 'reader', 'text': 'Мимо'},
+            {'post': 3000, 'author': 'reader', 'text': 'К новому посту'},
+        ])
+        errors = []
+        importer = ContentImporter(
+            on_error=lambda kind, number, error: errors.append(str(error))
+        )
+        stats = importer.import_file('posts', posts)
+        self.assertEqual((stats['imported'], stats['skipped']), (1, 2))
+        existing.refresh_from_db()
+        self.assertEqual(existing.text, 'Старый пост')
+        self.assertEqual(Post.objects.get(pk=3000).text, 'Новый id')
+        stats = importer.import_file('comments', comments)
+        self.assertEqual((stats['imported'], stats['skipped']), (1, 1))
+        self.assertFalse(Comment.objects.filter(post=existing).exists())
+        self.assertEqual(errors, [
+            f'id {existing.pk} уже занят', 'id 3000 уже занят',
+            f'нет импортированного поста {existing.pk}',
+        ])
+
+    def test_existing_follow_is_skipped(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        path = self.jsonl('follows.jsonl', [
+            {'user': 'reader', 'author': 'author'},
+        ])
+        stats = ContentImporter().import_file('follows', path)
+        self.assertEqual((stats['imported'], stats['skipped']), (0, 1))
+
+    def test_finish_updates_only_affected_timelines(self):
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=other)
+        Post.objects.create(author=other, text='Старый пост')
+        untouched = list(Timeline.objects.values_list('pk', flat=True))
+        self.assertEqual(len(untouched), 1)
+        path = self.jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Импортированный котик'},
+        ])
+        follows = self.jsonl('follows.jsonl', [
+            {'user': 'reader', 'author': 'author'},
+        ])
+        importer = ContentImporter()
+        importer.import_file('posts', path)
+        importer.import_file('follows', follows)
+        importer.finish()
+        self.assertEqual(importer.authors, {self.author.pk})
+        self.assertQuerysetEqual(
+            Timeline.objects.filter(author=other).values_list(
+                'pk', flat=True
+            ),
+            untouched, transform=int, ordered=False,
+        )
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        post = Post.objects.get(text='Импортированный котик')
+        self.assertIn(post.pk, get_backend().search('котик', limit=10))
+
+    def test_self_follow_is_rejected(self):
+        path = self.jsonl('follows.jsonl', [
+            {'user': 'author', 'author': 'author'},
+        ])
+        stats = ContentImporter().import_file('follows', path)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertFalse(Follow.objects.exists())
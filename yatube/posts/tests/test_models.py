@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, Comment, Follow
+from ..models import Group, Post, Comment, Follow, UserCounters
 
 User = get_user_model()
 
@@ -84,3 +87,60 @@ class PostsModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     args._meta.get_field(value).help_text, expected)
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        author = UserCounters.objects.get(user=self.author)
+        reader = UserCounters.objects.get(user=self.reader)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(reader.following_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        author.refresh_from_db()
+        reader.refresh_from_db()
+        self.assertEqual(author.followers_count, 0)
+        self.assertEqual(reader.following_count, 0)
+        post.delete()
+        author.refresh_from_db()
+        self.assertEqual(author.posts_count, 0)
+
+    def test_reconcile_counters_command(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {num}') for num in range(3)
+        )
+        UserCounters.objects.filter(user=self.reader).delete()
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertTrue(UserCounters.objects.filter(user=self.reader).exists())
+
+    def test_delete_user_with_counters(self):
+        """Удаление пользователя не воссоздаёт его счётчики."""
+        author = User.objects.create_user(username='deleted')
+        Post.objects.create(author=author, text='Пост')
+        Follow.objects.create(user=self.reader, author=author)
+        author_id = author.pk
+        author.delete()
+        self.assertFalse(
+            UserCounters.objects.filter(user_id=author_id).exists()
+        )
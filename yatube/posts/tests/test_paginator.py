@@ -2,10 +2,13 @@ from math import ceil
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Group, Post, Follow
+from ..paginators import CursorPaginator
 
 User = get_user_model()
 
@@ -59,19 +62,64 @@ class PaginatorCountTests(TestCase):
         )
         for reverse_name, template, args in url_pages:
             with self.subTest(reverse_name=reverse_name):
-                response = self.unauthorized_client.get(
-                    reverse_name, {'page': last_page}
-                )
-                if args:
-                    response = self.authorized_client.get(
-                        reverse_name, {'page': last_page}
-                    )
-                self.assertEqual(
-                    len(response.context['page_obj']), count_posts_on_page
-                )
-                response = self.unauthorized_client.get(reverse_name)
-                if args:
-                    response = self.authorized_client.get(reverse_name)
-                self.assertEqual(
-                    len(response.context['page_obj']), settings.NUMBER_POST
+                client = (self.authorized_client if args
+                          else self.unauthorized_client)
+                response = client.get(reverse_name)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), settings.NUMBER_POST)
+                self.assertFalse(page_obj.has_previous())
+                self.assertTrue(page_obj.has_next())
+                response = client.get(
+                    reverse_name, {'after': page_obj.paginator.next_cursor}
                 )
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), count_posts_on_page)
+                self.assertTrue(page_obj.has_previous())
+                self.assertFalse(page_obj.has_next())
+
+    def test_paginator_before_cursor(self):
+        """Курсор before возвращает на предыдущую страницу."""
+        first = self.unauthorized_client.get(
+            reverse('posts:index')).context['page_obj']
+        second = self.unauthorized_client.get(
+            reverse('posts:index'),
+            {'after': first.paginator.next_cursor}
+        ).context['page_obj']
+        self.assertTrue(set(first).isdisjoint(second))
+        back = self.unauthorized_client.get(
+            reverse('posts:index'),
+            {'before': second.paginator.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_paginator_invalid_cursor(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.unauthorized_client.get(
+            reverse('posts:group_list', args=[self.group.slug]),
+            {'after': 'not-a-cursor'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.NUMBER_POST)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_paginator_without_count_query(self):
+        """Страницы ленты не выполняют COUNT(*) и OFFSET."""
+        first = self.unauthorized_client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        ).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.unauthorized_client.get(
+                reverse('posts:group_list', args=[self.group.slug]),
+                {'after': first.paginator.next_cursor}
+            )
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_cursor_paginator_has_no_count(self):
+        """Количество строк не считается ни запросом, ни из кеша."""
+        paginator = CursorPaginator(Post.objects.all(), settings.NUMBER_POST)
+        with self.assertNumQueries(0):
+            with self.assertRaises(NotImplementedError):
+                paginator.count
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Наибольшее число SQL-запросов на страницу для вошедшего пользователя,
+# включая чтение сессии и пользователя. Не зависит от числа постов
+# и комментариев: новые строки не должны добавлять запросов. Страницы
+# с условным GET делают ещё один запрос — валидатор ETag.
+QUERY_BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 6,
+    'posts:profile': 6,
+    'posts:post_detail': 5,
+    'posts:post_comments': 2,
+    'posts:follow_index': 3,
+    'posts:api_index': 1,
+    'posts:api_group_list': 2,
+    'posts:api_profile': 2,
+    'posts:api_follow_index': 3,
+}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{num}',
+                                     first_name='Имя', last_name=str(num))
+            for num in range(4)
+        ]
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {num}', slug=f'group-{num}',
+                description='Описание группы',
+            )
+            for num in range(3)
+        ]
+        for num in range(12):
+            Post.objects.create(
+                author=cls.authors[num % 4],
+                group=cls.groups[num % 3],
+                text=f'Тестовый пост {num}',
+            )
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        for num in range(8):
+            Comment.objects.create(
+                post=cls.post, author=cls.authors[num % 4],
+                text=f'Комментарий {num}',
+            )
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', args=[self.groups[0].slug]
+            ),
+            'posts:profile': reverse(
+                'posts:profile', args=[self.authors[0].username]
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', args=[self.post.pk]
+            ),
+            'posts:post_comments': reverse(
+                'posts:post_comments', args=[self.post.pk]
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:api_index': reverse('posts:api_index'),
+            'posts:api_group_list': reverse(
+                'posts:api_group_list', args=[self.groups[0].slug]
+            ),
+            'posts:api_profile': reverse(
+                'posts:api_profile', args=[self.authors[0].username]
+            ),
+            'posts:api_follow_index': reverse('posts:api_follow_index'),
+        }
+
+    def assertWithinBudgets(self):
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[name],
+                    '\n'.join(query['sql'] for query in queries),
+                )
+
+    def test_views_fit_query_budgets(self):
+        self.assertWithinBudgets()
+
+    def test_budgets_do_not_grow_with_rows(self):
+        extra = [
+            User.objects.create_user(username=f'extra_{num}')
+            for num in range(5)
+        ]
+        for num, author in enumerate(extra):
+            Follow.objects.create(user=self.reader, author=author)
+            for group in self.groups:
+                Post.objects.create(
+                    author=author, group=group, text=f'Ещё пост {num}'
+                )
+            Comment.objects.create(
+                post=self.post, author=author, text=f'Ещё комментарий {num}'
+            )
+        self.assertWithinBudgets()
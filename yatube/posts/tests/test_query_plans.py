@@ -0,0 +1,91 @@
+import re
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..paginators import CursorPaginator
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN для SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for num in range(30):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if num % 2 else None,
+                text=f'Тестовый пост {num}',
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Комментарий {n}')
+            for n in range(30)
+        )
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexed(self, queryset):
+        plan = self.explain(queryset)
+        for detail in plan:
+            self.assertNotRegex(detail, FULL_SCAN, plan)
+            self.assertNotIn(TEMP_SORT, detail, plan)
+
+    def feed_pages(self, queryset, key=('pub_date', 'id')):
+        first = CursorPaginator(queryset, 10, key=key)
+        first.get_page()
+        for cursor in ({}, {'after': first.next_cursor},
+                       {'before': first.next_cursor}):
+            yield CursorPaginator(
+                queryset, 10, key=key, **cursor
+            ).page_queryset()
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент читают индекс без полного обхода и сортировки."""
+        feeds = (
+            ('index', Post.objects.select_related('author', 'group'),
+             ('pub_date', 'id')),
+            ('group_posts', self.group.posts.select_related('author'),
+             ('pub_date', 'id')),
+            ('profile', self.author.posts.select_related('group'),
+             ('pub_date', 'id')),
+            ('follow_index',
+             self.reader.timeline.select_related('post__author',
+                                                 'post__group'),
+             ('pub_date', 'post_id')),
+            ('comments', self.post.comments.select_related('author'),
+             ('created', 'id')),
+        )
+        for name, queryset, key in feeds:
+            for page_queryset in self.feed_pages(queryset, key):
+                with self.subTest(feed=name, sql=str(page_queryset.query)):
+                    self.assertIndexed(page_queryset)
+
+    def test_follow_lookups_use_indexes(self):
+        """Поиск подписки и подписчиков автора идёт по индексу."""
+        lookups = (
+            self.author.following.filter(user=self.reader),
+            Follow.objects.filter(author=self.author).values('user_id'),
+        )
+        for queryset in lookups:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertIndexed(queryset)
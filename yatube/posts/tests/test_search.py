@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search import get_backend, stem
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author', is_staff=True,
+                                            is_superuser=True)
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Котики гуляли по крыше всю ночь'
+        )
+        cls.cat = Post.objects.create(
+            author=cls.user, text='Котик, котик, котик и ещё раз котик'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собаки спали во дворе'
+        )
+
+    def search(self, query):
+        return get_backend().search(query, limit=10)
+
+    def test_stem_strips_russian_endings(self):
+        for word, expected in (
+            ('котики', 'котик'), ('Котиков', 'котик'), ('крыше', 'крыш'),
+            ('ёжик', 'ежик'), ('кот', 'кот'),
+        ):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_inflected_forms_are_found_and_ranked(self):
+        self.assertEqual(self.search('котиков'), [self.cat.pk, self.cats.pk])
+        self.assertEqual(self.search('КРЫША котик'), [self.cats.pk])
+        self.assertEqual(self.search('собака'), [self.dogs.pk])
+        self.assertEqual(self.search('"*)'), [])
+
+    def test_index_follows_post_changes(self):
+        post = Post.objects.get(pk=self.dogs.pk)
+        post.text = 'Теперь здесь про попугаев'
+        post.save()
+        self.assertEqual(self.search('собаки'), [])
+        self.assertEqual(self.search('попугай'), [post.pk])
+        post.delete()
+        self.assertEqual(self.search('попугай'), [])
+
+    def test_rebuild_command(self):
+        Post.objects.filter(pk=self.dogs.pk).update(text='Лошади в поле')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('лошадь'), [self.dogs.pk])
+        self.assertEqual(self.search('собаки'), [])
+
+    @override_settings(SEARCH_BACKEND='posts.search.LikeSearchBackend')
+    def test_like_backend(self):
+        self.assertEqual(self.search('крыши ночью'), [self.cats.pk])
+
+    def test_search_page(self):
+        response = Client().get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(
+            list(response.context['results']), [self.cat, self.cats]
+        )
+        self.assertIsNone(
+            Client().get(reverse('posts:search')).context['results']
+        )
+
+    def test_admin_search_uses_index(self):
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собаки'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dogs]
+        )
+
+    def test_search_query_uses_fts_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 есть только в SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN SELECT rowid FROM posts_post_fts '
+                "WHERE posts_post_fts MATCH '\"котик\"*' ORDER BY rank"
+            )
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
@@ -51,12 +51,15 @@ class PostURLTests(TestCase):
                 'posts:profile', args=[self.user_author.username]),
             f'/posts/{self.post.id}/': reverse(
                 'posts:post_detail', kwargs={'post_id': self.post.id}),
+            f'/posts/{self.post.id}/comments/': reverse(
+                'posts:post_comments', kwargs={'post_id': self.post.id}),
             f'/posts/{self.post.id}/edit/': reverse(
                 'posts:post_edit', kwargs={'post_id': self.post.id}),
             '/create/': reverse('posts:post_create'),
             f'/posts/{self.post.id}/comment/': reverse(
                 'posts:add_comment', kwargs={'post_id': self.post.id}),
             '/follow/': reverse('posts:follow_index'),
+            '/search/': reverse('posts:search'),
             f'/profile/{self.user_author.username}/follow/': reverse(
                 'posts:profile_follow', args=[self.user_author.username]),
             f'/profile/{self.user_author.username}/unfollow/': reverse(
@@ -70,12 +73,15 @@ class PostURLTests(TestCase):
         """Проверка, что URL-адрес использует соответствующий шаблон."""
         templates_pages_names = {
             reverse('posts:index'): 'posts/index.html',
+            reverse('posts:search'): 'posts/search.html',
             reverse('posts:group_list', kwargs={
                 'slug': self.group.slug}): 'posts/group_list.html',
             reverse('posts:profile', kwargs={
                 'username': self.user_author.username}): 'posts/profile.html',
             reverse('posts:post_detail', kwargs={
                 'post_id': self.post.id}): 'posts/post_detail.html',
+            reverse('posts:post_comments', kwargs={
+                'post_id': self.post.id}): 'posts/includes/comments.html',
             reverse('posts:post_edit', kwargs={
                 'post_id': self.post.id}): 'posts/create_post.html',
             reverse('posts:post_create'): 'posts/create_post.html',
@@ -104,6 +110,10 @@ class PostURLTests(TestCase):
              HTTPStatus.NOT_FOUND, True),
             (reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
              HTTPStatus.OK, None),
+            (reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+             HTTPStatus.OK, None),
+            (reverse('posts:post_comments', kwargs={'post_id': 0}),
+             HTTPStatus.NOT_FOUND, None),
             (reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
              HTTPStatus.FOUND, None),
             (reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
@@ -1,18 +1,29 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Group, Post
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -78,6 +89,48 @@ class PostPagesTests(TestCase):
         self.assertEqual(response.context['post'], self.post)
         self.assertEqual(response.context['post'].image, self.post.image)
 
+    def test_thumbnail_generated_on_save(self):
+        """Миниатюра создаётся при сохранении поста и выводится в ленте."""
+        self.assertTrue(self.post.thumbnail_url)
+        self.assertEqual(
+            (self.post.thumbnail_width, self.post.thumbnail_height),
+            (960, 339)
+        )
+        for width in settings.POST_THUMBNAIL_WIDTHS:
+            self.assertIn(f' {width}w', self.post.thumbnail_srcset)
+        response = self.authorized_client.get(
+            reverse('posts:group_list', args=[self.group.slug]))
+        self.assertContains(response, self.post.thumbnail_url)
+        self.assertContains(
+            response, f'srcset="{self.post.thumbnail_srcset}"'
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, '')
+
+    def test_post_detail_comments_paginated(self):
+        """Комментарии к посту выводятся страницами."""
+        extra = 5
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Коммент {num}')
+            for num in range(settings.NUMBER_COMMENT + extra)
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.NUMBER_COMMENT)
+        self.assertTrue(comments.has_next())
+        response = self.authorized_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'after': comments.paginator.next_cursor}
+        )
+        rest = response.context['comments']
+        self.assertEqual(len(rest), extra)
+        self.assertFalse(rest.has_next())
+        self.assertTrue(set(comments).isdisjoint(rest))
+
     def test_form_create_correct_context(self):
         """Шаблон 'form create' сформирован с правильным контекстом."""
         response = self.authorized_client.get(reverse('posts:post_create'))
@@ -92,14 +145,96 @@ class PostPagesTests(TestCase):
 
     def test_cache(self):
         """Проверка кеширование главной страницы"""
+        guest_client = Client()
+        post_add = guest_client.get(reverse('posts:index')).content
+        with self.assertNumQueries(0):
+            post_cached = guest_client.get(reverse('posts:index')).content
+        self.assertEqual(post_add, post_cached)
+
+    def test_cache_invalidation(self):
+        """Запись поста сбрасывает кеш главной страницы."""
+        guest_client = Client()
+        page_before = guest_client.get(reverse('posts:index')).content
         post_cache = Post.objects.create(
             text='Тест кеша',
             author=self.user,
         )
-        post_add = self.authorized_client.get(reverse('posts:index')).content
+        post_add = guest_client.get(reverse('posts:index')).content
+        self.assertNotEqual(page_before, post_add)
+        self.assertIn(post_cache.text.encode(), post_add)
         post_cache.delete()
-        post_delet = self.authorized_client.get(reverse('posts:index')).content
-        self.assertEqual(post_add, post_delet)
+        post_delet = guest_client.get(reverse('posts:index')).content
+        self.assertNotIn(post_cache.text.encode(), post_delet)
+
+    def test_cache_ignores_invalid_cursor(self):
+        """Страница с испорченным курсором не попадает в кеш."""
+        guest_client = Client()
+        for cursor in ('мусор', 'x' * 300):
+            with self.subTest(cursor=cursor):
+                guest_client.get(reverse('posts:index'), {'after': cursor})
+                with self.assertNumQueries(1):
+                    guest_client.get(
+                        reverse('posts:index'), {'after': cursor}
+                    )
+
+    def test_cache_key_uses_decoded_cursor(self):
+        """Ключ кеша не зависит от длины курсора и хранится с сроком."""
+        response = Client().get(reverse('posts:index'))
+        pages = response.context['page_obj'].paginator
+        cursor = pages.encode_cursor(self.post)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            Client().get(reverse('posts:index'), {'before': cursor})
+        key, _, timeout = cache_set.call_args[0]
+        self.assertLess(len(key), 100)
+        self.assertEqual(timeout, settings.FEED_PAGE_CACHE_TIMEOUT)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPrefetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user_author')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_posts(self, count):
+        for num in range(count):
+            Post.objects.create(
+                text=f'Пост с картинкой {num}',
+                author=self.user,
+                group=self.group,
+                image=SimpleUploadedFile(
+                    name=f'small{num}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            )
+        # Посты, созданные до сохранения миниатюр в модели.
+        Post.objects.update(thumbnail_url='')
+
+    def count_page_queries(self):
         cache.clear()
-        post_clear = self.authorized_client.get(reverse('posts:index')).content
-        self.assertNotEqual(post_add, post_clear)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(
+                reverse('posts:group_list', args=[self.group.slug])
+            )
+        return len(queries), response
+
+    def test_thumbnails_prefetched_for_page(self):
+        """Миниатюры страницы подгружаются одним запросом."""
+        self.create_posts(2)
+        few_queries, response = self.count_page_queries()
+        for post in response.context['page_obj']:
+            self.assertTrue(post.thumbnail_url)
+        self.create_posts(5)
+        many_queries, response = self.count_page_queries()
+        self.assertEqual(few_queries, many_queries)
@@ -0,0 +1,120 @@
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+def thumbnail_geometry(width):
+    """Геометрия миниатюры заданной ширины с пропорциями стандартной."""
+    base_width, base_height = map(
+        int, settings.POST_THUMBNAIL_GEOMETRY.split('x')
+    )
+    return f'{width}x{round(width * base_height / base_width)}'
+
+
+def post_thumbnail(image, geometry=None):
+    """Стандартная миниатюра картинки поста, как в шаблонах лент."""
+    return get_thumbnail(
+        image,
+        geometry or settings.POST_THUMBNAIL_GEOMETRY,
+        **settings.POST_THUMBNAIL_OPTIONS
+    )
+
+
+def thumbnail_fields(image):
+    """Значения полей поста для готовых миниатюр картинки.
+
+    Кроме стандартной миниатюры создаются варианты шириной
+    POST_THUMBNAIL_WIDTHS для атрибута srcset.
+    """
+    if not image:
+        return {
+            'thumbnail_url': '',
+            'thumbnail_width': None,
+            'thumbnail_height': None,
+            'thumbnail_srcset': '',
+        }
+    thumbnail = post_thumbnail(image)
+    if not thumbnail.exists():
+        return thumbnail_fields(None)
+    variants = [
+        post_thumbnail(image, thumbnail_geometry(width))
+        for width in settings.POST_THUMBNAIL_WIDTHS
+        if width != thumbnail.width
+    ]
+    variants.append(thumbnail)
+    return {
+        'thumbnail_url': thumbnail.url,
+        'thumbnail_width': thumbnail.width,
+        'thumbnail_height': thumbnail.height,
+        'thumbnail_srcset': ', '.join(
+            f'{variant.url} {variant.width}w'
+            for variant in sorted(variants, key=lambda v: v.width)
+            if variant.exists()
+        ),
+    }
+
+
+def thumbnail_kv_key(image):
+    """Ключ стандартной миниатюры в хранилище sorl-thumbnail.
+
+    Повторяет подготовку параметров из ThumbnailBackend.get_thumbnail,
+    чтобы ключ совпадал с тем, который ищет тег {% thumbnail %}.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(settings.POST_THUMBNAIL_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(
+        source, settings.POST_THUMBNAIL_GEOMETRY, options
+    )
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def _get_many_raw(keys):
+    """Прочитать значения хранилища одним обращением к кешу и к базе."""
+    kv_cache = getattr(default.kvstore, 'cache', None)
+    if kv_cache is None:
+        return {key: default.kvstore._get_raw(key) for key in keys}
+    values = {
+        key: value for key, value in kv_cache.get_many(keys).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in values]
+    if missing:
+        values.update(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+    return values
+
+
+def prefetch_thumbnails(posts):
+    """Заполнить поля миниатюр у постов страницы одним пакетным запросом.
+
+    Касается только постов, у которых миниатюра ещё не сохранена в модели;
+    не найденные миниатюры шаблон по-прежнему создаст через sorl.
+    """
+    pending = {
+        thumbnail_kv_key(post.image): post
+        for post in posts
+        if post.image and not post.thumbnail_url
+    }
+    if not pending:
+        return
+    for key, value in _get_many_raw(list(pending)).items():
+        thumbnail = deserialize_image_file(value)
+        post = pending[key]
+        post.thumbnail_url = thumbnail.url
+        post.thumbnail_width = thumbnail.width
+        post.thumbnail_height = thumbnail.height
@@ -0,0 +1,81 @@
+from django.db import connection
+from django.db.models import Max
+
+from .batching import BATCH_SIZE, batched, bulk_create_batched
+from .models import Follow, Post, Timeline
+
+REBUILD_SQL = (
+    'INSERT INTO {timeline} (user_id, post_id, author_id, pub_date) '
+    'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+    'FROM {follow} follow '
+    'INNER JOIN {post} post ON post.author_id = follow.author_id '
+    'WHERE {condition}'
+)
+# Не больше параметров в одном IN, чем позволяет SQLite.
+AUTHOR_CHUNK = 500
+
+
+def fan_out_post(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    bulk_create_batched(
+        Timeline,
+        (Timeline(user_id=user_id, post=post, author_id=post.author_id,
+                  pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту подписчика уже опубликованные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', 'pub_date')
+    bulk_create_batched(
+        Timeline,
+        (Timeline(user_id=user_id, post_id=post_id, author_id=author_id,
+                  pub_date=pub_date)
+         for post_id, pub_date in posts.iterator()),
+        ignore_conflicts=True,
+    )
+
+
+def remove(user_id, author_id):
+    """Убрать посты автора из ленты отписавшегося пользователя."""
+    Timeline.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _rebuild_sql(condition):
+    return REBUILD_SQL.format(
+        timeline=connection.ops.quote_name(Timeline._meta.db_table),
+        follow=connection.ops.quote_name(Follow._meta.db_table),
+        post=connection.ops.quote_name(Post._meta.db_table),
+        condition=condition,
+    )
+
+
+def rebuild(batch_size=BATCH_SIZE, author_ids=None):
+    """Пересобрать ленты по текущим подпискам.
+
+    Записи создаются одним INSERT ... SELECT на каждые batch_size
+    подписок, без передачи строк через Python. С author_ids
+    пересобираются только записи этих авторов в лентах их подписчиков.
+    """
+    if author_ids is not None:
+        with connection.cursor() as cursor:
+            for chunk in batched(sorted(author_ids), AUTHOR_CHUNK):
+                Timeline.objects.filter(author_id__in=chunk).delete()
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(_rebuild_sql(
+                    f'follow.author_id IN ({placeholders})'
+                ), chunk)
+        return
+    Timeline.objects.all().delete()
+    sql = _rebuild_sql('follow.id > %s AND follow.id <= %s')
+    last_id = Follow.objects.aggregate(last=Max('pk'))['last'] or 0
+    with connection.cursor() as cursor:
+        for start in range(0, last_id, batch_size):
+            cursor.execute(sql, [start, start + batch_size])
@@ -1,68 +1,173 @@
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 
+from core.metrics import record_cache
+
+from . import conditional, exporter
+from .caching import feed_page_key
+from .cards import prefetch_cards
+from .conditional import validated
+from .counters import get_counters
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
+from .paginators import CursorPaginator
+from .search import get_backend
 
 
-def paginator(page_number, post_list):
-    post = Paginator(post_list, settings.NUMBER_POST)
-    page_obj = post.get_page(page_number)
-    return page_obj
+def paginator(request, post_list, key=('pub_date', 'id'),
+              per_page=settings.NUMBER_POST, **kwargs):
+    return CursorPaginator(
+        post_list,
+        per_page,
+        key=key,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        **kwargs
+    ).get_page()
 
 
 def index(request):
-    post_list = cache.get('index_page')
-    if not post_list:
-        post_list = Post.objects.select_related('author', 'group')
-        cache.set('index_page', post_list, 20)
+    pages = CursorPaginator(
+        Post.objects.select_related('author', 'group'),
+        settings.NUMBER_POST,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    cache_key = feed_page_key('index_page', request, pages)
+    page_obj = cache.get(cache_key) if cache_key else None
+    record_cache('index_page', page_obj is not None)
+    if page_obj is None:
+        page_obj = pages.get_page()
+        prefetch_cards(page_obj)
+        if cache_key:
+            cache.set(cache_key, page_obj, settings.FEED_PAGE_CACHE_TIMEOUT)
     context = {
-        'page_obj': paginator(request.GET.get('page'), post_list),
+        'page_obj': page_obj,
         'title': 'Последние обновления на сайте',
     }
     return render(request, 'posts/index.html', context)
 
 
+@validated(conditional.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
+    page_obj = paginator(request, post_list)
+    prefetch_cards(page_obj)
     context = {
         'group': group,
-        'page_obj': paginator(request.GET.get('page'), post_list),
+        'page_obj': page_obj,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@validated(conditional.profile)
 def profile(request, username):
-    post_author = get_object_or_404(User, username=username)
+    post_author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
     post_list = post_author.posts.select_related('group')
     following = (request.user.is_authenticated
                  and post_author.following.filter(user=request.user).exists())
+    counters = get_counters(post_author)
+    page_obj = paginator(request, post_list)
+    prefetch_cards(page_obj)
     context = {
-        'page_obj': paginator(request.GET.get('page'), post_list),
-        'count_post': post_list.count,
+        'page_obj': page_obj,
+        'count_post': counters.posts_count,
+        'counters': counters,
         'author': post_author,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def comments_page(request, post):
+    return paginator(
+        request,
+        post.comments.select_related('author'),
+        key=('created', 'id'),
+        per_page=settings.NUMBER_COMMENT,
+    )
+
+
+@validated(conditional.post_detail)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group'), pk=post_id
+        Post.objects.select_related('author__counters', 'group'), pk=post_id
     )
     context = {
         'post': post,
-        'count_post': post.author.posts.count(),
+        'count_post': get_counters(post.author).posts_count,
         'form': CommentForm(),
-        'comments': post.comments.select_related('author')
+        'comments': comments_page(request, post),
     }
     return render(request, 'posts/post_detail.html', context, )
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(request, post),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = None
+    if query:
+        ids = get_backend().search(query, limit=settings.SEARCH_MAX_RESULTS)
+        results = Paginator(ids, settings.NUMBER_POST).get_page(
+            request.GET.get('page')
+        )
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            results.object_list
+        )
+        results.object_list = [
+            posts[pk] for pk in results.object_list if pk in posts
+        ]
+        prefetch_cards(results)
+    context = {
+        'query': query,
+        'results': results,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def export_content(request, kind):
+    file_format = request.GET.get('format', 'jsonl')
+    compress = request.GET.get('gzip') == '1'
+    try:
+        blocks = exporter.stream(
+            kind,
+            file_format,
+            compress=compress,
+            author=request.GET.get('author'),
+            group=request.GET.get('group'),
+            since=exporter.parse_bound(request.GET.get('since')),
+            until=exporter.parse_bound(request.GET.get('until')),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        blocks,
+        content_type=('application/gzip' if compress
+                      else exporter.CONTENT_TYPES[file_format]),
+    )
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        exporter.filename(kind, file_format, compress)
+    )
+    return response
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -111,11 +216,14 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group'
     )
+    page_obj = paginator(request, entries, key=('pub_date', 'post_id'))
+    page_obj.object_list = [entry.post for entry in page_obj]
+    prefetch_cards(page_obj)
     context = {
-        'page_obj': paginator(request.GET.get('page'), post_list),
+        'page_obj': page_obj,
         'title': 'Подписки на любимых авторов',
     }
     return render(request, 'posts/follow.html', context)
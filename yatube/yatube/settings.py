@@ -48,11 +48,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -124,6 +129,16 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 NUMBER_POST: int = 10
+NUMBER_COMMENT: int = 20
+# Сколько секунд хранится страница главной ленты. Запись поста сдвигает
+# версию лент и сбрасывает кеш раньше, срок ограничивает число записей.
+FEED_PAGE_CACHE_TIMEOUT: int = 10 * 60
+# Полнотекстовый поиск: FTS5 для SQLite, GIN для PostgreSQL, иначе LIKE.
+# Можно указать свой класс, например 'posts.search.LikeSearchBackend'.
+SEARCH_BACKEND = None
+SEARCH_MAX_RESULTS: int = 1000
+# Сколько самых новых совпадений упорядочивается по релевантности.
+SEARCH_CANDIDATES: int = 5000
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -136,6 +151,93 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загруженные картинки уменьшаются до этого размера и пересохраняются
+# без метаданных; WEBP заменяется на JPEG, если Pillow его не умеет.
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 85
+
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+# Ширины вариантов миниатюры для srcset, создаются при загрузке.
+POST_THUMBNAIL_WIDTHS = (480, 720, 960)
+POST_THUMBNAIL_SIZES = '(min-width: 992px) 960px, 100vw'
+# Сколько секунд хранится отрисованная карточка поста в лентах. Ключ
+# меняется вместе с постом, автором и группой, поэтому срок нужен
+# только для вытеснения старых версий.
+POST_CARD_CACHE_TIMEOUT: int = 24 * 60 * 60
+
+# Заголовок Server-Timing и журнал замеров SQL, шаблонов и миниатюр.
+REQUEST_TIMING: bool = False
+# Метрики для Prometheus по адресу /metrics. Чтобы сложить метрики
+# нескольких рабочих процессов, укажите общий для них каталог.
+METRICS: bool = False
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL: float = 1.0
+# Адреса, с которых метрики доступны без входа; сотрудникам — с любого.
+# За обратным прокси все запросы приходят с его адреса, поэтому
+# снаружи /metrics нужно закрыть на самом прокси.
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+# Профили cProfile (.pstats и .collapsed для flame graph): по ?profile=1
+# от сотрудника и для доли запросов, оказавшихся медленнее порога.
+PROFILER: bool = False
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_SAMPLE_RATE: float = 0.0
+PROFILER_SLOW_MS: int = 500
+PROFILER_MAX_FILES: int = 50
+# Запросы дольше порога (мс) пишутся в SLOW_SQL_LOG; None — отключено.
+# Сводка по формам запросов: manage.py slow_sql_report.
+SLOW_SQL_MS = None
+SLOW_SQL_LOG = os.path.join(BASE_DIR, 'slow_sql.log')
+# Запрос одной формы, повторённый в ответе NPLUSONE_THRESHOLD раз, — N+1.
+# 'raise' или 'warn'; None — предупреждения только при DEBUG.
+# TEST_RUNNER и conftest.py включают 'raise' для тестов.
+NPLUSONE_MODE = None
+NPLUSONE_THRESHOLD: int = 5
+# Пропускаемые формы запросов по имени маршрута. При записи поста
+# sorl-thumbnail создаёт каждый вариант миниатюры отдельными запросами;
+# их число ограничено POST_THUMBNAIL_WIDTHS, а не числом строк.
+# В лентах такие запросы — N+1, и там они не пропускаются.
+NPLUSONE_IGNORE = {
+    'posts:post_create': ('"thumbnail_kvstore"', 'BEGIN'),
+    'posts:post_edit': ('"thumbnail_kvstore"', 'BEGIN'),
+}
+TEST_RUNNER = 'core.runner.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'slow_sql': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_SQL_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.slow_sql': {
+            'handlers': ['slow_sql'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',